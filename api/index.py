@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 import sys
 import os
 
@@ -6,7 +6,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import app from parent directory
-from app import app as flask_app
+from app import app as flask_app, metrics, request_profiler, startup_report
+from lazy import loaded_modules
 
 @flask_app.route('/api/health', methods=['GET'])
 def health_check():
@@ -20,8 +21,21 @@ def health_check():
         'config': {
             'max_upload_size_mb': int(os.environ.get('MAX_UPLOAD_SIZE_MB', 16)),
             'session_lifetime_hours': int(os.environ.get('SESSION_LIFETIME_HOURS', 1))
-        }
+        },
+        'startup': {**startup_report, 'loaded_modules_now': loaded_modules()}
     })
 
+@flask_app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Pipeline stage timers and counters in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@flask_app.route('/api/profiles', methods=['GET'])
+def profiles_endpoint():
+    """cProfile reports of the slowest requests (requires PROFILE_REQUESTS=True)"""
+    if not flask_app.config['PROFILE_REQUESTS']:
+        return jsonify({'error': 'Request profiling is disabled; set PROFILE_REQUESTS=True'}), 404
+    return Response(request_profiler.dump(), mimetype='text/plain')
+
 # This is needed for Vercel
 app = flask_app 
\ No newline at end of file
@@ -1,24 +1,47 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, jsonify, session
-import pandas as pd
-import numpy as np
+import time
+_import_started = time.perf_counter()  # For the startup report at the end of this module
+
+from flask import (Flask, Response, g, render_template, request, redirect, url_for, flash, jsonify, session,
+                   send_file)
 import random
 import os
-import csv
+import re
 import json
-from io import StringIO, BytesIO
-from collections import deque, defaultdict
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import hashlib
+from io import BytesIO
+from collections import defaultdict
 import colorsys
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
 from datetime import datetime, timedelta
 import werkzeug.utils
 import uuid
 import shutil
 import tempfile
 from dotenv import load_dotenv
+from lazy import lazy_import, loaded_modules
+from placement import PLACEMENT_ENGINES
+from arrangement import ArrayArrangement, compact_rooms, expand_rooms, department_counts, shuffled_departments
+from store import create_store
+from ingest import (validate_chunk, ingest_csv, load_roster, file_digest, RosterCache, zip_csv_members,
+                    read_rosters, merge_rosters, write_roster)
+from solver import optimize_seats
+from prediction import load_rule_sets
+from repair import repair_arrangement
+from planner import plan_rooms
+from lookup import lookup_id, SeatIndexCache
+from packed import PackedArrangement, write_packed, write_packed_update, text_student_ids
+from rooms import Room, uniform_rooms, load_inventory, parse_inventory
+from metrics import Metrics, RequestProfiler
+from cleanup import UploadJanitor
+from artifacts import ExportCache
+from jobs import JobQueue
+from scheduling import SLOT_COLUMN, split_slots, schedule_slots
+from export import (stream_csv, write_pdf,
+                    render_room_pdfs, can_merge_pdfs, merge_pdfs, write_pdf_zip)
+
+# Loaded on first use, so light routes and health checks start without them
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
 
 # Load environment variables from .env file
 load_dotenv()
@@ -40,10 +63,92 @@ else:
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secure-key-here')
 app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_SIZE_MB', 16)) * 1024 * 1024  # Default: 16MB
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=int(os.environ.get('SESSION_LIFETIME_HOURS', 1)))  # Default: 1 hour
+app.config['SEATING_ALGORITHM'] = os.environ.get('SEATING_ALGORITHM', 'indexed')  # 'indexed' or 'greedy'
+app.config['ARRANGEMENT_MODE'] = os.environ.get('ARRANGEMENT_MODE', 'arrays')  # 'arrays' or 'records'
+app.config['SOLVER_TIME_BUDGET_MS'] = int(os.environ.get('SOLVER_TIME_BUDGET_MS', 0))  # 0: no optimization
+app.config['SOLVER_MAX_TIME_BUDGET_MS'] = int(os.environ.get('SOLVER_MAX_TIME_BUDGET_MS', 5000))  # Per-request cap
+app.config['INGEST_CHUNK_ROWS'] = int(os.environ.get('INGEST_CHUNK_ROWS', 50000))
+app.config['BULK_UPLOAD_WORKERS'] = int(os.environ.get('BULK_UPLOAD_WORKERS', 4))  # 0 or 1: validate in turn
+app.config['BULK_UPLOAD_MAX_MB'] = int(os.environ.get('BULK_UPLOAD_MAX_MB', 256))  # Uncompressed ZIP contents
+app.config['PDF_ROWS_PER_PAGE'] = int(os.environ.get('PDF_ROWS_PER_PAGE', 30))
+app.config['PDF_EXPORT_WORKERS'] = int(os.environ.get('PDF_EXPORT_WORKERS', 0))  # 0 or 1: render in-process
+app.config['SCHEDULE_WORKERS'] = int(os.environ.get('SCHEDULE_WORKERS', 0))  # 0 or 1: arrange slots in-process
+app.config['PREDICTION_RULES_FILE'] = os.environ.get('PREDICTION_RULES_FILE', '')  # JSON file of extra rule sets
+app.config['PREDICTION_RULE_SET'] = os.environ.get('PREDICTION_RULE_SET', 'default')
+app.config['STARTUP_BUDGET_MS'] = int(os.environ.get('STARTUP_BUDGET_MS', 1000))  # 0: no check
+app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', 'False').lower() == 'true'
+app.config['PROFILE_KEEP_SLOWEST'] = int(os.environ.get('PROFILE_KEEP_SLOWEST', 10))
+app.config['ASYNC_PROCESSING'] = os.environ.get('ASYNC_PROCESSING', 'False').lower() == 'true'
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['UPLOAD_MAX_AGE_HOURS'] = int(os.environ.get('UPLOAD_MAX_AGE_HOURS', 24))
+app.config['UPLOAD_CLEANUP_INTERVAL_SECONDS'] = int(os.environ.get('UPLOAD_CLEANUP_INTERVAL_SECONDS', 600))
+app.config['ROSTER_CACHE_MAX_MB'] = int(os.environ.get('ROSTER_CACHE_MAX_MB', 256))
+app.config['EXPORT_CACHE_MAX_MB'] = int(os.environ.get('EXPORT_CACHE_MAX_MB', 512))
+
+# Server-side arrangement storage ('memory', 'sqlite' or 'redis')
+app.config['ARRANGEMENT_STORE'] = os.environ.get('ARRANGEMENT_STORE', 'memory')
+app.config['ARRANGEMENT_STORE_PATH'] = os.environ.get(
+    'ARRANGEMENT_STORE_PATH', os.path.join(tempfile.gettempdir(), 'smart_seating_arrangements.sqlite3'))
+app.config['ARRANGEMENT_STORE_URL'] = os.environ.get('ARRANGEMENT_STORE_URL', 'redis://localhost:6379/0')
+app.config['ARRANGEMENT_STORE_MAX_ENTRIES'] = int(os.environ.get('ARRANGEMENT_STORE_MAX_ENTRIES', 256))
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+arrangement_store = create_store(
+    app.config['ARRANGEMENT_STORE'],
+    ttl_seconds=app.config['PERMANENT_SESSION_LIFETIME'].total_seconds(),
+    path=app.config['ARRANGEMENT_STORE_PATH'],
+    url=app.config['ARRANGEMENT_STORE_URL'],
+    max_entries=app.config['ARRANGEMENT_STORE_MAX_ENTRIES']
+)
+
+# Attendance prediction rule sets, compiled once
+prediction_rules = load_rule_sets(app.config['PREDICTION_RULES_FILE'])
+if app.config['PREDICTION_RULE_SET'] not in prediction_rules:
+    raise ValueError(f"Unknown prediction rule set: {app.config['PREDICTION_RULE_SET']}")
+
+# Pipeline timers and counters, plus opt-in cProfile capture of the slowest requests
+metrics = Metrics()
+request_profiler = RequestProfiler(keep=app.config['PROFILE_KEEP_SLOWEST'])
+
+# Background arrangement jobs, polled by the results page
+job_queue = JobQueue(workers=app.config['JOB_WORKERS'],
+                     ttl_seconds=app.config['PERMANENT_SESSION_LIFETIME'].total_seconds())
+
+# Parsed and predicted rosters, expiring together with their uploaded files
+roster_cache = RosterCache(
+    ttl_seconds=app.config['UPLOAD_MAX_AGE_HOURS'] * 3600,
+    max_bytes=app.config['ROSTER_CACHE_MAX_MB'] * 1024 * 1024
+)
+
+# Expired uploads are deleted by a background thread, never on the request path
+upload_janitor = UploadJanitor(app.config['UPLOAD_FOLDER'], app.config['UPLOAD_MAX_AGE_HOURS'] * 3600, metrics,
+                               interval_seconds=app.config['UPLOAD_CLEANUP_INTERVAL_SECONDS'],
+                               logger=app.logger, subfolders=('exports', 'arrangements'))
+# Skip cleanup in serverless environment
+if not os.environ.get('VERCEL_REGION'):
+    upload_janitor.start()
+
+# Rendered CSV/PDF exports, shared by every download of the same arrangement
+export_cache = ExportCache(os.path.join(app.config['UPLOAD_FOLDER'], 'exports'),
+                           app.config['EXPORT_CACHE_MAX_MB'] * 1024 * 1024, metrics, upload_janitor)
+
+# Finished arrangements, packed into files that every worker maps read-only
+os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'arrangements'), exist_ok=True)
+
+def load_packed_arrangement(key):
+    """Map the packed file of a lookup ID, or return None if there is none"""
+    if not re.fullmatch(r'[0-9a-f]{20}', key or ''):
+        return None
+    try:
+        return PackedArrangement(arrangement_path(key))
+    except FileNotFoundError:
+        return None
+
+# Open arrangement files by lookup ID, shared by the results, download and seat lookup routes
+packed_arrangements = SeatIndexCache(load_packed_arrangement)
+
 # Department colors for visualization
 DEPARTMENT_COLORS = {
     'CSE': '#FF6B6B',
@@ -76,76 +181,125 @@ DEPARTMENT_COLORS = {
 }
 
 class SeatingManager:
-    def __init__(self, num_rooms, seats_per_room, department_buffer=2):
-        self.num_rooms = num_rooms
-        self.seats_per_room = seats_per_room
+    def __init__(self, num_rooms, seats_per_room, department_buffer=2, algorithm='indexed', seed=None,
+                 rooms=None):
+        if algorithm not in PLACEMENT_ENGINES:
+            raise ValueError(f"Unknown seating algorithm: {algorithm}")
+        # Room inventory (list of Room); without one, num_rooms identical rooms
+        self.inventory = rooms
+        self.rooms = rooms or uniform_rooms(num_rooms, seats_per_room)
+        self.capacities = [room.capacity for room in self.rooms]
+        self.num_rooms = len(self.rooms)
+        self.seats_per_room = max(self.capacities) if rooms else seats_per_room
         self.department_buffer = department_buffer
-        self.total_capacity = num_rooms * seats_per_room
+        self.algorithm = algorithm
+        self.seed = seed  # Same seed and students, same arrangement
+        self.total_capacity = sum(self.capacities)
+        self.room_names = [room.name for room in self.rooms]
         
     def validate_capacity(self, num_students):
         if num_students > self.total_capacity:
             raise ValueError(f"Insufficient capacity: {num_students} students vs {self.total_capacity} seats")
     
+    def place(self, departments, occupancy=None, history=None, capacities=None):
+        """Return the zero-based room index for each department in order
+        
+        occupancy, history and capacities optionally give each room's current
+        state and seat count, to continue placing into an existing arrangement.
+        """
+        engine = PLACEMENT_ENGINES[self.algorithm]
+        return engine(departments, self.num_rooms, capacities or self.capacities, self.department_buffer,
+                      occupancy, history)
+    
     def arrange_seating(self, students):
+        rng = random.Random(self.seed) if self.seed is not None else random
+        students = rng.sample(students, len(students))  # Shuffle
+        assignments = self.place([student['Department'] for student in students])
+        
+        buckets = [[] for _ in range(self.num_rooms)]
+        for student, room_index in zip(students, assignments):
+            if room_index is not None:
+                buckets[room_index].append(student)
+        
         rooms = defaultdict(list)
-        department_history = defaultdict(lambda: deque(maxlen=self.department_buffer))
-        
-        students = random.sample(students, len(students))  # Shuffle
-        
-        for student in students:
-            placed = False
-            for room_num in range(1, self.num_rooms + 1):
-                room_name = f'Room-{room_num}'
-                if len(rooms[room_name]) < self.seats_per_room:
-                    current_dept = student['Department']
-                    
-                    # Check department history in this room
-                    if current_dept not in department_history[room_name]:
-                        rooms[room_name].append(student)
-                        department_history[room_name].append(current_dept)
-                        placed = True
-                        break
-                    
-            if not placed:  # Fallback placement
-                for room_num in range(1, self.num_rooms + 1):
-                    room_name = f'Room-{room_num}'
-                    if len(rooms[room_name]) < self.seats_per_room:
-                        rooms[room_name].append(student)
-                        break
-                        
+        for room_name, room_students in zip(self.room_names, buckets):
+            if room_students:
+                rooms[room_name] = room_students
         return rooms
+    
+    def arrange_frame(self, students_df, rng=None):
+        """Arrange a Student_ID/Department frame without building per-student dicts"""
+        if rng is None and self.seed is not None:
+            rng = np.random.default_rng(self.seed)
+        return ArrayArrangement.from_frame(students_df, self, rng)
+    
+    def optimize(self, arrangement, time_budget, seats_per_row=None, rng=None):
+        """Reduce adjacent same-department seats by local search within a time budget
+        
+        Seat adjacency follows each room's layout unless seats_per_row is given.
+        """
+        if rng is None and self.seed is not None:
+            rng = random.Random(self.seed)
+        layouts = None if seats_per_row else [room.neighbors() for room in self.rooms]
+        order, report = optimize_seats(arrangement.department_codes, arrangement.room_offsets,
+                                       seats_per_row or 6, time_budget, rng=rng, layouts=layouts)
+        return arrangement.reordered(order), report
+    
+    def update(self, arrangement, add=(), remove=(), capacities=None):
+        """Return the rooms of a packed arrangement changed by a roster or room change, keeping other seats in place"""
+        return repair_arrangement(arrangement, self, add, remove, capacities)
 
-def generate_sample_data(num_students):
-    """Generate sample student data for testing"""
-    departments = list(DEPARTMENT_COLORS.keys())[:5]  # Use first 5 departments from DEPARTMENT_COLORS
-    years = [1, 2, 3, 4]
+def generate_sample_data(num_students, seed=None, num_departments=5, department_skew=0.0):
+    """Generate sample student data for testing
+    
+    Departments are drawn with weights proportional to 1 / rank ** department_skew,
+    so a skew of 0 is uniform and larger values concentrate students in the first
+    departments. Passing a seed makes the data reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    departments = list(DEPARTMENT_COLORS.keys())[:num_departments]  # Use departments from DEPARTMENT_COLORS first
+    departments += [f'DEPT-{n}' for n in range(len(departments) + 1, num_departments + 1)]
+    weights = 1.0 / np.arange(1, len(departments) + 1) ** department_skew
     
     data = {
         'Student_ID': [f'STU{i:03d}' for i in range(1, num_students + 1)],
-        'Department': [random.choice(departments) for _ in range(num_students)],
-        'Year': [random.choice(years) for _ in range(num_students)],
-        'Past_Attendance': [random.uniform(0.5, 1.0) for _ in range(num_students)],
-        'Attendance_Score': [random.uniform(0, 100) for _ in range(num_students)]
+        'Department': np.array(departments)[rng.choice(len(departments), num_students, p=weights / weights.sum())],
+        'Year': rng.integers(1, 5, num_students),
+        'Past_Attendance': rng.uniform(0.5, 1.0, num_students),
+        'Attendance_Score': rng.uniform(0, 100, num_students)
     }
     
     return pd.DataFrame(data)
 
-def generate_seat_map(room_assignments, seats_per_room, seats_per_row=6):
-    """Generate a visual seat map for each room"""
+def generate_seat_map(room_assignments, seats_per_room, seats_per_row=6, layouts=None):
+    """Generate a visual seat map for each room (layouts maps room names to Room objects)"""
     seat_maps = {}
     for room, students in room_assignments.items():
-        rows = []
-        for i in range(0, len(students), seats_per_row):
-            row = []
-            for j, student in enumerate(students[i:i+seats_per_row]):
-                row.append({
-                    'seat_number': i + j + 1,
+        if layouts and room in layouts:
+            # Seats follow the room's grid, skipping blocked seats
+            rows = defaultdict(list)
+            for seat_num, (student, (row, column)) in enumerate(zip(students, layouts[room].positions()), 1):
+                rows[row].append({
+                    'seat_number': seat_num,
                     'student_id': student['Student_ID'],
                     'department': student['Department'],
-                    'row': i // seats_per_row + 1,
-                    'column': j + 1
+                    'row': row,
+                    'column': column
                 })
-            rows.append(row)
+            rows = list(rows.values())
+        else:
+            rows = []
+            for i in range(0, len(students), seats_per_row):
+                row = []
+                for j, student in enumerate(students[i:i+seats_per_row]):
+                    row.append({
+                        'seat_number': i + j + 1,
+                        'student_id': student['Student_ID'],
+                        'department': student['Department'],
+                        'row': i // seats_per_row + 1,
+                        'column': j + 1
+                    })
+                rows.append(row)
         seat_maps[room] = {
             'seats': rows,
             'total_seats': len(students),
@@ -183,84 +337,257 @@ def allowed_file(filename):
 
 def validate_csv(df):
     """Validate the CSV file structure and content"""
-    required_columns = {'Student_ID', 'Department', 'Year', 'Past_Attendance'}
-    
-    # Check required columns
-    if not required_columns.issubset(df.columns):
-        missing = required_columns - set(df.columns)
-        raise ValueError(f"Missing required columns: {', '.join(missing)}")
-    
-    # Check for empty values
-    for col in required_columns:
-        if df[col].isnull().any():
-            raise ValueError(f"Column '{col}' contains empty values")
-    
-    # Validate data types
-    if not pd.api.types.is_numeric_dtype(df['Year']):
-        raise ValueError("'Year' column must contain numeric values")
-    if not pd.api.types.is_numeric_dtype(df['Past_Attendance']):
-        raise ValueError("'Past_Attendance' column must contain numeric values")
-    
-    # Validate value ranges
-    if not (df['Past_Attendance'].between(0, 1).all()):
-        raise ValueError("'Past_Attendance' values must be between 0 and 1")
+    validate_chunk(df)
     
     # Validate minimum number of rows
     if len(df) < 1:
         raise ValueError("CSV file must contain at least one row of data")
 
-def predict_attendance(df):
+def predict_attendance(df, rule_set=None):
     """Predict student attendance based on simple rules without ML
     
-    Rules:
+    The rules come from a declarative rule set (see prediction.py); the
+    default one is:
     1. Students with past attendance > 0.8 are very likely to attend (0.9 probability)
     2. Students with past attendance between 0.6-0.8 have moderate chance (0.7 probability)
     3. Students with past attendance < 0.6 have lower chance (0.5 probability)
     4. Year of study affects likelihood (seniors more likely to attend than freshmen)
     """
-    # Create a copy to avoid modifying the original DataFrame
-    result_df = df.copy()
+    rules = prediction_rules[rule_set or app.config['PREDICTION_RULE_SET']]
+    return rules.apply(df)
+
+def upload_owner():
+    """Return the ID that ties the current browser session's uploads together"""
+    if 'upload_owner' not in session:
+        session['upload_owner'] = str(uuid.uuid4())
+    return session['upload_owner']
+
+def track_upload(filename):
+    """Register a saved upload with the cleanup janitor under the current session"""
+    upload_janitor.track(filename, upload_owner())
+    return filename
+
+def save_upload(file):
+    """Save an uploaded roster under a unique name and validate it"""
+    if file.filename == '':
+        raise ValueError("No file selected")
+    
+    if not allowed_file(file.filename):
+        raise ValueError("Only CSV files are allowed")
+    
+    # Create unique filename to prevent overwriting
+    file_ext = file.filename.rsplit('.', 1)[1].lower()
+    unique_filename = f"{str(uuid.uuid4())}.{file_ext}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
     
-    # Initialize attendance probability column
-    result_df['Attendance_Probability'] = 0.0
+    # Save file
+    file.save(filepath)
     
-    # Apply rule 1: Based on past attendance
-    result_df.loc[result_df['Past_Attendance'] > 0.8, 'Attendance_Probability'] = 0.9
-    result_df.loc[(result_df['Past_Attendance'] >= 0.6) & (result_df['Past_Attendance'] <= 0.8), 'Attendance_Probability'] = 0.7
-    result_df.loc[result_df['Past_Attendance'] < 0.6, 'Attendance_Probability'] = 0.5
+    # Validate CSV content
+    try:
+        ensure_ingested(filepath)
+    except Exception as e:
+        # Clean up invalid file
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise ValueError(f"Invalid CSV file: {str(e)}")
     
-    # Apply rule 2: Year of study bonus (seniors are more likely to attend)
-    # Add a small bonus for each year of study (0.02 per year)
-    year_bonus = (result_df['Year'] - 1) * 0.02
-    result_df['Attendance_Probability'] = result_df['Attendance_Probability'] + year_bonus
+    return track_upload(unique_filename)
+
+def is_zip_file(filename):
+    """Check if an upload is a ZIP archive"""
+    return filename.lower().endswith('.zip')
+
+def save_bulk_upload(files):
+    """Validate several rosters (CSV files or ZIP archives of them) and save them merged as one
     
-    # Ensure probability is between 0 and 1
-    result_df['Attendance_Probability'] = result_df['Attendance_Probability'].clip(0, 1)
+    Files are validated in parallel and merged with duplicate Student_ID
+    detection; the merged roster is arranged like a single upload.
+    """
+    sources = []
+    for file in files:
+        if file.filename == '':
+            continue
+        if is_zip_file(file.filename):
+            sources.extend(zip_csv_members(file.read(), app.config['BULK_UPLOAD_MAX_MB'] * 1024 * 1024))
+        elif allowed_file(file.filename):
+            sources.append((file.filename, file.read()))
+        else:
+            raise ValueError(f"Only CSV or ZIP files are allowed: {file.filename}")
+    if not sources:
+        raise ValueError("No CSV files found in the upload")
     
-    # Predict attendance (1 = will attend, 0 = won't attend)
-    # A student is predicted to attend if their probability is > 0.65
-    result_df['Predicted_Attendance'] = (result_df['Attendance_Probability'] > 0.65).astype(int)
+    with metrics.stage('validate_bulk'):
+        frames = read_rosters(sources, app.config['BULK_UPLOAD_WORKERS'], app.config['INGEST_CHUNK_ROWS'])
+    with metrics.stage('merge_rosters'):
+        df = merge_rosters(frames)
+    metrics.increment('bulk_upload_files', len(frames))
     
-    return result_df
+    filename = f"bulk_{uuid.uuid4()}.csv"
+    write_roster(df, os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    return track_upload(filename)
 
-def cleanup_old_files(max_age_hours=24):
-    """Clean up files older than the specified age"""
+def save_room_inventory(file):
+    """Save an uploaded room inventory (CSV or JSON) under a unique name and validate it
+    
+    Returns None when no inventory file was sent.
+    """
+    if file is None or file.filename == '':
+        return None
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    if extension not in ('csv', 'json'):
+        raise ValueError("Room inventory must be a CSV or JSON file")
+    
+    filename = f"rooms_{uuid.uuid4()}.{extension}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    file.save(filepath)
     try:
-        # Skip cleanup in serverless environment
-        if os.environ.get('VERCEL_REGION'):
-            return
-            
-        current_time = datetime.now()
-        for filename in os.listdir(app.config['UPLOAD_FOLDER']):
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            # Get file modification time
-            file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-            # If file is older than max_age_hours, delete it
-            if (current_time - file_time) > timedelta(hours=max_age_hours):
-                if os.path.isfile(filepath):
-                    os.remove(filepath)
+        load_inventory(filepath)
     except Exception as e:
-        app.logger.error(f"Error during cleanup: {str(e)}")
+        os.remove(filepath)
+        raise ValueError(f"Invalid room inventory: {str(e)}")
+    return track_upload(filename)
+
+def load_room_inventory(filename):
+    """Load a saved room inventory, or return None when no inventory is given"""
+    if not filename:
+        return None
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], werkzeug.utils.secure_filename(filename))
+    if not os.path.exists(filepath):
+        raise ValueError("Room inventory not found")
+    return load_inventory(filepath)
+
+def manager_for(seating_data):
+    """Rebuild the SeatingManager that produced stored seating data, with any rooms resized since"""
+    inventory = seating_data.get('room_inventory')
+    rooms = [Room.from_dict(room) for room in inventory] if inventory else None
+    capacities = seating_data.get('room_capacities')
+    if capacities:
+        # Rooms grown past their grid get extra rows so every student has a seat position; closed rooms keep theirs
+        rooms = [room.resized(capacities[room.name]) if capacities.get(room.name) else room
+                 for room in rooms or uniform_rooms(seating_data['num_rooms'], seating_data['seats_per_room'])]
+    return SeatingManager(seating_data['num_rooms'], seating_data['seats_per_room'],
+                          algorithm=seating_data.get('algorithm', app.config['SEATING_ALGORITHM']),
+                          rooms=rooms)
+
+def ensure_ingested(filepath):
+    """Validate an uploaded roster unless identical content is already cached"""
+    with metrics.stage('hash_file'):
+        key = file_digest(filepath)
+    if roster_cache.get(key) is None:
+        with metrics.stage('ingest_csv'):
+            ingest_csv(filepath, app.config['INGEST_CHUNK_ROWS'])
+
+def load_predicted_roster(filepath, key=None):
+    """Return the validated, prediction-augmented roster for an uploaded file"""
+    if key is None:
+        with metrics.stage('hash_file'):
+            key = file_digest(filepath)
+    df = roster_cache.get(key)
+    if df is None:
+        metrics.increment('roster_cache_misses')
+        with metrics.stage('read_roster'):
+            df = load_roster(filepath, app.config['INGEST_CHUNK_ROWS'])
+        with metrics.stage('predict_attendance'):
+            df = predict_attendance(df)
+        roster_cache.set(key, df)
+    else:
+        metrics.increment('roster_cache_hits')
+    return df
+
+def parse_seed(value):
+    """Parse an optional seed parameter (None when it is missing)"""
+    if value in (None, ''):
+        return None
+    seed = int(value)
+    if seed < 0:
+        raise ValueError("Seed must be a non-negative integer")
+    return seed
+
+def parse_time_budget(value):
+    """Parse an optional solver time budget in milliseconds (SOLVER_TIME_BUDGET_MS when it is missing)"""
+    if value in (None, ''):
+        return app.config['SOLVER_TIME_BUDGET_MS']
+    time_budget_ms = int(value)
+    if time_budget_ms < 0:
+        raise ValueError("Time budget must be a non-negative number of milliseconds")
+    if time_budget_ms > app.config['SOLVER_MAX_TIME_BUDGET_MS']:
+        raise ValueError(f"Time budget cannot exceed {app.config['SOLVER_MAX_TIME_BUDGET_MS']} ms")
+    return time_budget_ms
+
+def arrangement_cache_key(roster_key, manager, *options):
+    """Memoization key for the arrangement of a roster under a manager's settings and seed"""
+    parts = [roster_key, manager.num_rooms, manager.seats_per_room, manager.department_buffer,
+             manager.seed, manager.algorithm, app.config['PREDICTION_RULE_SET'],
+             [room.to_dict() for room in manager.inventory] if manager.inventory else None, *options]
+    return 'arrangement:' + hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+def arrangement_path(key):
+    return os.path.join(app.config['UPLOAD_FOLDER'], 'arrangements', f'{key}.seat')
+
+def publish_arrangement(compact, probabilities=None):
+    """Write a compact arrangement to its packed file unless it exists, returning its lookup ID"""
+    # Hashed as stored, so an arrangement read back from its file keeps the same ID
+    key = lookup_id(text_student_ids(compact))
+    path = arrangement_path(key)
+    if not os.path.exists(path):
+        with metrics.stage('pack_arrangement'):
+            write_packed(path, compact, probabilities)
+    # Expires like an upload, counted from the last time the arrangement was produced
+    upload_janitor.track(os.path.relpath(path, app.config['UPLOAD_FOLDER']))
+    return key
+
+def publish_update(key, packed, patch, room_names):
+    """Write an arrangement's packed file with the rooms of a repair patch replaced, returning its lookup ID"""
+    if patch['rooms']:
+        # Derived from the base ID and the change, so nothing but the changed rooms is hashed
+        key = lookup_id({'base': key, **text_student_ids(patch)})
+        path = arrangement_path(key)
+        if not os.path.exists(path):
+            with metrics.stage('pack_arrangement'):
+                write_packed_update(path, packed, patch, room_names)
+    upload_janitor.track(os.path.relpath(arrangement_path(key), app.config['UPLOAD_FOLDER']))
+    return key
+
+def open_arrangement(seating_data):
+    """Return the memory-mapped packed arrangement of stored seating data"""
+    packed = packed_arrangements.get(seating_data.get('lookup_id'))
+    if packed is None:
+        raise ValueError('Seating data has expired. Please generate the arrangement again.')
+    return packed
+
+def get_session_arrangement():
+    """Load the current session's arrangement from the arrangement store"""
+    session_id = session.get('session_id')
+    if not session_id:
+        return None
+    return arrangement_store.get(session_id)
+
+def get_requested_arrangement():
+    """Rebuild the seeded arrangement named in the query string, or load the session's"""
+    if not request.args.get('seed') or not request.args.get('filename'):
+        return get_session_arrangement()
+    return build_seating_data(werkzeug.utils.secure_filename(request.args['filename']),
+                              int(request.args.get('num_rooms', 4)),
+                              int(request.args.get('seats_per_room', 25)),
+                              request.args.get('algorithm', app.config['SEATING_ALGORITHM']),
+                              parse_time_budget(request.args.get('time_budget_ms')),
+                              parse_seed(request.args['seed']),
+                              request.args.get('rooms_file'))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profile = request_profiler.start() if app.config['PROFILE_REQUESTS'] else None
+
+@app.after_request
+def record_request_metrics(response):
+    seconds = time.perf_counter() - g.get('request_started', time.perf_counter())
+    metrics.observe('request_seconds', seconds, endpoint=request.endpoint or 'unknown')
+    metrics.increment('responses', status=response.status_code)
+    if g.get('profile') is not None:
+        request_profiler.finish(g.profile, request.full_path, seconds)
+    return response
 
 @app.errorhandler(404)
 def page_not_found(e):
@@ -272,9 +599,6 @@ def internal_server_error(e):
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    # Cleanup old files
-    cleanup_old_files()
-    
     if request.method == 'POST':
         try:
             num_rooms = int(request.form.get('num_rooms', 4))           
@@ -283,49 +607,38 @@ def index():
             if num_rooms < 1 or seats_per_room < 1:
                 raise ValueError("Invalid room configuration")
             
+            seed = parse_seed(request.form.get('seed'))
+            # Optional room inventory replacing the identical rooms
+            rooms_file = save_room_inventory(request.files.get('rooms_file'))
+            
             if 'generate_test' in request.form:
-                test_data = generate_sample_data(100)
+                test_data = generate_sample_data(100, seed=seed)
                 filename = f"sample_data_{uuid.uuid4()}.csv"
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
                 test_data.to_csv(filepath, index=False)
+                track_upload(filename)
                 return redirect(url_for('process_seating', 
                                       filename=filename,
                                       num_rooms=num_rooms,
-                                      seats_per_room=seats_per_room))
+                                      seats_per_room=seats_per_room,
+                                      algorithm=request.form.get('algorithm', app.config['SEATING_ALGORITHM']),
+                                      seed=seed,
+                                      rooms_file=rooms_file))
             
             if 'file' not in request.files:
                 raise ValueError("No file part in the request")
             
-            file = request.files['file']
-            if file.filename == '':
-                raise ValueError("No file selected")
-            
-            if not allowed_file(file.filename):
-                raise ValueError("Only CSV files are allowed")
-            
-            # Create unique filename to prevent overwriting
-            file_ext = file.filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{str(uuid.uuid4())}.{file_ext}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # Save file
-            file.save(filepath)
-            
-            # Validate CSV content
-            try:
-                df = pd.read_csv(filepath)
-                validate_csv(df)
-            except Exception as e:
-                # Clean up invalid file
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                raise ValueError(f"Invalid CSV file: {str(e)}")
+            # Save and validate the uploaded roster
+            unique_filename = save_upload(request.files['file'])
             
             # If everything is valid, redirect to process
             return redirect(url_for('process_seating',
                                   filename=unique_filename,
                                   num_rooms=num_rooms,
-                                  seats_per_room=seats_per_room))
+                                  seats_per_room=seats_per_room,
+                                  algorithm=request.form.get('algorithm', app.config['SEATING_ALGORITHM']),
+                                  seed=seed,
+                                  rooms_file=rooms_file))
             
         except Exception as e:
             flash(str(e), 'danger')
@@ -333,79 +646,293 @@ def index():
     
     return render_template('index.html')
 
+def arrange_students(manager, attending_students, time_budget_ms=0, mode='arrays'):
+    """Seat the attending students of a predicted roster, returning the compact arrangement and solver report
+    
+    The solver (time_budget_ms > 0) only runs on integer-coded arrays, so it
+    is skipped in 'records' mode.
+    """
+    manager.validate_capacity(len(attending_students))
+    solver_report = None
+    if mode == 'arrays':
+        with metrics.stage('arrange_seating'):
+            arrangement = manager.arrange_frame(attending_students[['Student_ID', 'Department']])
+        if time_budget_ms > 0:
+            with metrics.stage('optimize'):
+                arrangement, solver_report = manager.optimize(arrangement, time_budget_ms / 1000)
+        with metrics.stage('compact_rooms'):
+            compact = arrangement.to_compact()
+    else:
+        with metrics.stage('arrange_seating'):
+            room_assignments = manager.arrange_seating(
+                attending_students[['Student_ID', 'Department']].to_dict('records')
+            )
+        with metrics.stage('compact_rooms'):
+            compact = compact_rooms(room_assignments)
+    metrics.increment('students_seated', len(attending_students))
+    return compact, solver_report
+
+def build_seating_data(filename, num_rooms, seats_per_room, algorithm, time_budget_ms=0, seed=None,
+                       rooms_file=None):
+    """Run validate/predict/arrange for an uploaded roster and return the seating data
+    
+    Without a seed a random one is drawn and recorded. Results are memoized in
+    the arrangement store, so the same roster, rooms and seed give back the
+    same arrangement without recomputing it. rooms_file names an uploaded room
+    inventory that replaces num_rooms identical rooms of seats_per_room seats.
+    """
+    # Only uploads inside the upload folder, whose roster cache is written next to them
+    filename = werkzeug.utils.secure_filename(filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not os.path.exists(filepath):
+        raise ValueError("File not found")
+    if seed is None:
+        seed = random.randrange(2**32)
+    
+    manager = SeatingManager(num_rooms, seats_per_room, algorithm=algorithm, seed=seed,
+                             rooms=load_room_inventory(rooms_file))
+    with metrics.stage('hash_file'):
+        roster_key = file_digest(filepath)
+    memo_key = arrangement_cache_key(roster_key, manager, time_budget_ms, app.config['ARRANGEMENT_MODE'])
+    seating_data = arrangement_store.get(memo_key)
+    # The memo only names the packed file, which may have expired on its own
+    packed_path = seating_data and arrangement_path(seating_data['lookup_id'])
+    if seating_data is not None and os.path.exists(packed_path):
+        metrics.increment('arrangement_memo_hits')
+        upload_janitor.track(os.path.relpath(packed_path, app.config['UPLOAD_FOLDER']))
+        return {**seating_data, 'filename': filename}
+    metrics.increment('arrangement_memo_misses')
+    
+    # Validated roster with rule-based predictions, cached by content hash
+    df = load_predicted_roster(filepath, roster_key)
+    
+    attending_students = df[df['Predicted_Attendance'] == 1]
+    
+    # Seating arrangement
+    compact, solver_report = arrange_students(manager, attending_students, time_budget_ms,
+                                              app.config['ARRANGEMENT_MODE'])
+    key = publish_arrangement(compact, dict(zip(attending_students['Student_ID'].tolist(),
+                                                attending_students['Attendance_Probability'].tolist())))
+    
+    # Generate department colors
+    departments = df['Department'].unique().tolist()
+    department_colors = generate_department_colors(departments)
+    
+    # The seats themselves live in the packed file; seat grids are drawn client-side from it
+    seating_data = {
+        'lookup_id': key,
+        'department_counts': department_counts(compact),
+        'total_students': len(df),
+        'attending_count': len(attending_students),
+        'num_rooms': manager.num_rooms,
+        'seats_per_room': manager.seats_per_room,
+        'total_capacity': manager.total_capacity,
+        'room_inventory': [room.to_dict() for room in manager.inventory] if manager.inventory else None,
+        'rooms_file': rooms_file,
+        'algorithm': algorithm,
+        'seed': seed,
+        'time_budget_ms': time_budget_ms,
+        'departments': departments,
+        'department_colors': department_colors,
+        'filename': filename,
+        'solver': solver_report
+    }
+    arrangement_store.set(memo_key, seating_data)
+    return seating_data
+
+def store_arrangement(session_id, seating_data):
+    """Save seating data server-side under the session's arrangement key"""
+    with metrics.stage('store_arrangement'):
+        arrangement_store.set(session_id, seating_data)
+
+def run_arrangement_job(session_id, *args):
+    """Background job: build an arrangement and store it under the job's ID"""
+    store_arrangement(session_id, build_seating_data(*args))
+
+# Query parameters that identify a seeded arrangement
+DOWNLOAD_PARAMS = ('filename', 'num_rooms', 'seats_per_room', 'algorithm', 'time_budget_ms', 'seed', 'rooms_file')
+
+def render_results(seating_data):
+    """Render the results page for stored seating data
+    
+    Only room names and sizes go into the page; the seats of each room are
+    fetched from results_room and drawn when the room scrolls into view.
+    """
+    packed = open_arrangement(seating_data)
+    layouts = {room.name: room for room in manager_for(seating_data).rooms}
+    rooms = [{'name': room, 'number': room.split('-')[-1], 'seats': seats,
+              'columns': layouts[room].columns,
+              'blocked': [f'{row}-{column}' for row, column in sorted(layouts[room].blocked)]}
+             for room, seats in packed.room_sizes().items()]
+    # Seeded arrangements can be regenerated by the download routes without the session
+    download_params = {}
+    if seating_data.get('seed') is not None:
+        download_params = {key: seating_data.get(key) for key in DOWNLOAD_PARAMS}
+    
+    with metrics.stage('render_template'):
+        return render_template('results.html',
+                            total_students=seating_data['total_students'],
+                            attending_count=seating_data['attending_count'],
+                            rooms=rooms,
+                            departments=seating_data['departments'],
+                            department_colors=seating_data['department_colors'],
+                            department_counts=seating_data['department_counts'],
+                            department_dictionary=packed.departments,
+                            num_rooms=seating_data['num_rooms'],
+                            seats_per_room=seating_data['seats_per_room'],
+                            total_capacity=seating_data['total_capacity'],
+                            solver_report=seating_data.get('solver'),
+                            seed=seating_data.get('seed'),
+                            lookup_id=seating_data.get('lookup_id'),
+                            download_params=download_params)
+
 @app.route('/process')
 def process_seating():
     try:
-        filename = request.args.get('filename')
+        filename = werkzeug.utils.secure_filename(request.args.get('filename', ''))
         if not filename:
             raise ValueError("No filename provided")
             
         num_rooms = int(request.args.get('num_rooms', 4))
         seats_per_room = int(request.args.get('seats_per_room', 25))
-        
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        if not os.path.exists(filepath):
-            raise ValueError("File not found")
-        
-        # Read and validate CSV
-        df = pd.read_csv(filepath)
-        validate_csv(df)
-        
-        # Use rule-based prediction instead of ML
-        df = predict_attendance(df)
-        
-        attending_students = df[df['Predicted_Attendance'] == 1]
-        
-        # Seating arrangement
-        manager = SeatingManager(num_rooms, seats_per_room)
-        manager.validate_capacity(len(attending_students))
-        room_assignments = manager.arrange_seating(
-            attending_students[['Student_ID', 'Department']].to_dict('records')
-        )
-        
-        # Generate seat maps
-        seat_maps = generate_seat_map(room_assignments, seats_per_room)
-        
-        # Generate department colors
-        departments = df['Department'].unique().tolist()
-        department_colors = generate_department_colors(departments)
+        algorithm = request.args.get('algorithm', app.config['SEATING_ALGORITHM'])
+        time_budget_ms = parse_time_budget(request.args.get('time_budget_ms'))
+        seed = parse_seed(request.args.get('seed'))
+        rooms_file = request.args.get('rooms_file')
+        run_async = request.args.get('async', '1' if app.config['ASYNC_PROCESSING'] else '0') == '1'
         
         # Generate session ID for this arrangement
         session_id = str(uuid.uuid4())
+        session['session_id'] = session_id
         
-        # Store data in Flask session
-        seating_data = {
-            'rooms': room_assignments,
-            'seat_maps': seat_maps,
-            'total_students': len(df),
-            'attending_count': len(attending_students),
-            'num_rooms': num_rooms,
-            'seats_per_room': seats_per_room,
-            'departments': departments,
-            'department_colors': department_colors,
-            'attendance_probabilities': df['Attendance_Probability'].tolist(),
-            'filename': filename
-        }
+        if run_async:
+            # Queue the work and let the results page poll for it
+            job_queue.submit(session_id, run_arrangement_job, session_id,
+                             filename, num_rooms, seats_per_room, algorithm, time_budget_ms, seed, rooms_file)
+            return render_template('results.html', job_id=session_id, rooms=[], departments=[],
+                                   department_colors={}, department_counts={}, department_dictionary=[],
+                                   download_params={})
         
-        # Store in session
-        session['seating_data'] = seating_data
-        session['session_id'] = session_id
+        seating_data = build_seating_data(filename, num_rooms, seats_per_room, algorithm, time_budget_ms, seed,
+                                          rooms_file)
         
-        return render_template('results.html',
-                            total_students=len(df),
-                            attending_count=len(attending_students),
-                            seat_maps=seat_maps,
-                            departments=departments,
-                            department_colors=department_colors,
-                            seating_data=json.dumps(seating_data),
-                            num_rooms=num_rooms,
-                            seats_per_room=seats_per_room,
-                            attendance_probabilities=df['Attendance_Probability'].tolist())
+        # Store server-side; the session cookie only carries the key
+        store_arrangement(session_id, seating_data)
+        
+        return render_results(seating_data)
     
     except Exception as e:
         flash(str(e), 'danger')
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status of a queued arrangement job"""
+    job = job_queue.status(job_id)
+    if job is None:
+        # Unknown here (another worker or a restart), but the result may be stored
+        if arrangement_store.get(job_id) is None:
+            return jsonify({'id': job_id, 'status': 'unknown'}), 404
+        job = {'id': job_id, 'status': 'done', 'error': None}
+    if job['status'] == 'done':
+        job['result_url'] = url_for('show_results')
+    return jsonify(job)
+
+@app.route('/results')
+def show_results():
+    """Show the current session's stored arrangement"""
+    seating_data = get_session_arrangement()
+    if seating_data is None:
+        flash('No seating data available. Please generate the arrangement first.', 'danger')
+        return redirect(url_for('index'))
+    try:
+        return render_results(seating_data)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('index'))
+
+@app.route('/results/data')
+def results_data():
+    """Return the session's whole arrangement in compact form (for search and exports)"""
+    seating_data = get_session_arrangement()
+    if seating_data is None:
+        return jsonify({'error': 'No seating data available'}), 404
+    try:
+        packed = open_arrangement(seating_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    return jsonify(packed.to_compact())
+
+@app.route('/results/rooms/<path:room>')
+def results_room(room):
+    """Return one room of the session's arrangement in compact form"""
+    seating_data = get_session_arrangement()
+    if seating_data is None:
+        return jsonify({'error': 'No seating data available'}), 404
+    try:
+        packed = open_arrangement(seating_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    if room not in packed:
+        return jsonify({'error': 'Room not found'}), 404
+    return jsonify(packed.compact_room(room))
+
+@app.route('/results/update', methods=['POST'])
+def update_arrangement():
+    """Add or remove students and close or resize rooms without reshuffling other seats"""
+    seating_data = get_session_arrangement()
+    if seating_data is None:
+        return jsonify({'error': 'No seating data available'}), 404
+    
+    try:
+        payload = request.get_json(silent=True) or {}
+        add = payload.get('add') or []
+        if any('Student_ID' not in student or 'Department' not in student for student in add):
+            raise ValueError("Added students need a Student_ID and a Department")
+        # Packed arrangements keep student IDs as text, so numeric IDs match too
+        add = [{**student, 'Student_ID': str(student['Student_ID'])} for student in add]
+        remove = [str(student_id) for student_id in payload.get('remove') or []]
+        capacities = {room: int(seats) for room, seats in (payload.get('capacities') or {}).items()}
+        # Earlier room changes stay in force for later updates
+        capacities = {**seating_data.get('room_capacities', {}), **capacities}
+        
+        packed = open_arrangement(seating_data)
+        manager = manager_for(seating_data)
+        with metrics.stage('repair_arrangement'):
+            patch, report = manager.update(packed, add, remove, capacities)
+        key = publish_update(seating_data['lookup_id'], packed, patch, manager.room_names)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Counts change only by what left and joined the changed rooms
+    counts = dict(seating_data['department_counts'])
+    before = {'departments': packed.departments,
+              'rooms': {room: {'department_codes': packed.room_codes(room)}
+                        for room in patch['rooms'] if room in packed}}
+    for dept, count in department_counts(before).items():
+        counts[dept] = counts.get(dept, 0) - count
+    for dept, count in department_counts(patch).items():
+        counts[dept] = counts.get(dept, 0) + count
+    departments = seating_data['departments'] + [dept for dept in patch['departments']
+                                                 if dept not in seating_data['departments']]
+    change = report['added'] - report['removed']
+    seating_data = {
+        **seating_data,
+        'lookup_id': key,
+        'department_counts': counts,
+        'total_students': seating_data['total_students'] + change,
+        'attending_count': seating_data['attending_count'] + change,
+        'departments': departments,
+        'department_colors': generate_department_colors(departments),
+        'room_capacities': capacities,
+        'seed': None  # No longer the arrangement that the seed reproduces
+    }
+    store_arrangement(session['session_id'], seating_data)
+    
+    return jsonify({**report,
+                    'attending_count': seating_data['attending_count'],
+                    'department_counts': seating_data['department_counts']})
+
 @app.route('/process', methods=['POST'])
 def process_next_file():
     try:
@@ -418,147 +945,346 @@ def process_next_file():
         if 'file' not in request.files:
             raise ValueError("No file part in the request")
         
-        file = request.files['file']
-        if file.filename == '':
-            raise ValueError("No file selected")
-        
-        if not allowed_file(file.filename):
-            raise ValueError("Only CSV files are allowed")
-        
-        # Create unique filename to prevent overwriting
-        file_ext = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{str(uuid.uuid4())}.{file_ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        
-        # Save file
-        file.save(filepath)
-        
-        # Validate CSV content
-        try:
-            df = pd.read_csv(filepath)
-            validate_csv(df)
-        except Exception as e:
-            # Clean up invalid file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            raise ValueError(f"Invalid CSV file: {str(e)}")
+        # Save and validate the uploaded roster; several files or a ZIP are merged into one
+        files = request.files.getlist('file')
+        if len(files) == 1 and not is_zip_file(files[0].filename):
+            unique_filename = save_upload(files[0])
+        else:
+            unique_filename = save_bulk_upload(files)
         
         # If everything is valid, redirect to process
         return redirect(url_for('process_seating',
                               filename=unique_filename,
                               num_rooms=num_rooms,
-                              seats_per_room=seats_per_room))
+                              seats_per_room=seats_per_room,
+                              algorithm=request.form.get('algorithm', app.config['SEATING_ALGORITHM']),
+                              seed=parse_seed(request.form.get('seed')),
+                              rooms_file=save_room_inventory(request.files.get('rooms_file'))))
         
     except Exception as e:
         flash(str(e), 'danger')
         return redirect(url_for('index'))
 
+def read_api_request():
+    """Return the JSON payload (None for a CSV body), the parameters and the roster bytes of an API request"""
+    if request.is_json:
+        payload = request.get_json()
+        # Key the roster cache on the students only, not the room parameters
+        return payload, payload, json.dumps(payload.get('students') or [], separators=(',', ':')).encode()
+    return None, request.args, request.get_data()
+
+def load_api_roster(key, payload, body):
+    """Return the validated, prediction-augmented roster sent to the API, cached by body hash"""
+    df = roster_cache.get(key)
+    if df is None:
+        with metrics.stage('read_roster'):
+            if payload is not None:
+                df = pd.DataFrame(payload.get('students') or [])
+            else:
+                df = pd.read_csv(BytesIO(body))
+            validate_csv(df)
+        with metrics.stage('predict_attendance'):
+            df = predict_attendance(df)
+        roster_cache.set(key, df)
+    return df
+
+@app.route('/api/v1/arrangements', methods=['POST'])
+def api_create_arrangement():
+    """Generate an arrangement from CSV or JSON students, returning compact JSON or NDJSON"""
+    try:
+        payload, params, body = read_api_request()
+        
+        num_rooms = int(params.get('num_rooms', 4))
+        seats_per_room = int(params.get('seats_per_room', 25))
+        algorithm = params.get('algorithm', app.config['SEATING_ALGORITHM'])
+        time_budget_ms = parse_time_budget(params.get('time_budget_ms'))
+        seed = parse_seed(params.get('seed'))
+        if seed is None:
+            seed = random.randrange(2**32)
+        
+        if num_rooms < 1 or seats_per_room < 1:
+            raise ValueError("Invalid room configuration")
+        
+        inventory = payload.get('rooms') if payload is not None else None
+        manager = SeatingManager(num_rooms, seats_per_room, algorithm=algorithm, seed=seed,
+                                 rooms=parse_inventory(inventory) if inventory else None)
+        key = hashlib.sha256(body).hexdigest()
+        memo_key = arrangement_cache_key(key, manager, time_budget_ms, 'api')
+        result = arrangement_store.get(memo_key)
+        if result is not None:
+            metrics.increment('arrangement_memo_hits')
+        else:
+            metrics.increment('arrangement_memo_misses')
+            # Parse, validate and predict in memory, cached by body hash
+            df = load_api_roster(key, payload, body)
+            
+            attending_students = df[df['Predicted_Attendance'] == 1]
+            compact, solver_report = arrange_students(manager, attending_students, time_budget_ms)
+            
+            result = {
+                'total_students': len(df),
+                'attending_count': len(attending_students),
+                'num_rooms': manager.num_rooms,
+                'seats_per_room': manager.seats_per_room,
+                'total_capacity': manager.total_capacity,
+                'seed': seed,
+                'departments': compact['departments'],
+                'solver': solver_report,
+                'rooms': compact['rooms']
+            }
+            arrangement_store.set(memo_key, result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+        # Summary line first, then one line per room
+        def generate():
+            summary = {key: value for key, value in result.items() if key != 'rooms'}
+            yield json.dumps(summary) + '\n'
+            for room, data in result['rooms'].items():
+                yield json.dumps({'room': room, **data}) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    return jsonify(result)
+
+@app.route('/api/v1/plan', methods=['POST'])
+def api_plan_rooms():
+    """Find the fewest rooms of seats_per_room seats that seat a roster without department_buffer fallbacks
+    
+    The roster is an uploaded file (filename) or sent like to the arrangements
+    API. It is parsed and predicted once; every probe of the search only
+    re-runs placement over the same seeded student order, so arranging with
+    the returned seed and num_rooms reproduces the planned placement.
+    """
+    try:
+        payload, params, body = read_api_request()
+        seats_per_room = int(params.get('seats_per_room', 25))
+        algorithm = params.get('algorithm', app.config['SEATING_ALGORITHM'])
+        seed = parse_seed(params.get('seed'))
+        if seed is None:
+            seed = random.randrange(2**32)
+        if seats_per_room < 1:
+            raise ValueError("Invalid room configuration")
+        manager = SeatingManager(1, seats_per_room, algorithm=algorithm, seed=seed)
+        if algorithm == 'best_fit':
+            # It only opens the rooms it needs, so more rooms never remove fallbacks
+            raise ValueError("Capacity planning needs an engine that uses every room ('indexed' or 'greedy')")
+        
+        if params.get('filename'):
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], werkzeug.utils.secure_filename(params['filename']))
+            if not os.path.exists(filepath):
+                raise ValueError("File not found")
+            df = load_predicted_roster(filepath)
+        else:
+            df = load_api_roster(hashlib.sha256(body).hexdigest(), payload, body)
+        attending_students = df[df['Predicted_Attendance'] == 1]
+        
+        max_rooms = int(params.get('max_rooms') or max(len(attending_students), 1))
+        if max_rooms < 1:
+            raise ValueError("max_rooms must be at least 1")
+        
+        # The student order arrange_frame uses for this seed
+        categories, order = shuffled_departments(attending_students, np.random.default_rng(seed))
+        departments = categories.codes[order].tolist()
+        
+        def place(num_rooms):
+            metrics.increment('plan_probes')
+            return SeatingManager(num_rooms, seats_per_room, manager.department_buffer, algorithm,
+                                  seed).place(departments)
+        
+        with metrics.stage('plan_rooms'):
+            plan = plan_rooms(place, departments, seats_per_room, manager.department_buffer, max_rooms)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        **plan,
+        'seats_per_room': seats_per_room,
+        'total_capacity': plan['num_rooms'] * seats_per_room if plan['num_rooms'] else None,
+        'max_rooms': max_rooms,
+        'department_buffer': manager.department_buffer,
+        'total_students': len(df),
+        'attending_count': len(attending_students),
+        'algorithm': algorithm,
+        'seed': seed
+    })
+
+@app.route('/schedule', methods=['POST'])
+def schedule_exams():
+    """Seat several exam slots over the same rooms in one request"""
+    try:
+        num_rooms = int(request.form.get('num_rooms', 4))
+        seats_per_room = int(request.form.get('seats_per_room', 25))
+        
+        if num_rooms < 1 or seats_per_room < 1:
+            raise ValueError("Invalid room configuration")
+        
+        files = request.files.getlist('files')
+        if not files:
+            raise ValueError("No files selected")
+        
+        # One slot per file, or one slot per Exam_Slot value of a single roster
+        slots = {}
+        for file in files:
+            slot_name = file.filename.rsplit('.', 1)[0] or f'Slot-{len(slots) + 1}'
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], save_upload(file))
+            df = load_predicted_roster(filepath)
+            attending_students = df[df['Predicted_Attendance'] == 1]
+            
+            if len(files) == 1 and SLOT_COLUMN in df.columns:
+                slots.update(split_slots(attending_students))
+            else:
+                if slot_name in slots:
+                    slot_name = f'{slot_name}-{len(slots) + 1}'
+                slots[slot_name] = attending_students
+        
+        seed = parse_seed(request.form.get('seed'))
+        if seed is None:
+            seed = random.randrange(2**32)
+        manager = SeatingManager(num_rooms, seats_per_room,
+                                 algorithm=request.form.get('algorithm', app.config['SEATING_ALGORITHM']),
+                                 seed=seed,
+                                 rooms=load_room_inventory(save_room_inventory(request.files.get('rooms_file'))))
+        arrangements = schedule_slots(manager, slots, app.config['SCHEDULE_WORKERS'])
+        
+        return jsonify({
+            'num_rooms': manager.num_rooms,
+            'seats_per_room': manager.seats_per_room,
+            'seed': seed,
+            'slots': {
+                slot: {
+                    'attending_count': len(arrangement),
+                    'rooms': arrangement.rooms()
+                }
+                for slot, arrangement in arrangements.items()
+            }
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+def send_export(path, key, mimetype):
+    """Send a cached export, answering conditional (ETag/Last-Modified) and byte-range requests"""
+    extension = path.rsplit('.', 1)[1]
+    return send_file(path, mimetype=mimetype, as_attachment=True,
+                     download_name=f'seating_arrangement_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}',
+                     conditional=True, etag=f'{key}-{os.stat(path).st_mtime_ns:x}')
+
 @app.route('/download/csv')
 def download_csv():
-    if 'seating_data' not in session:
-        flash('No seating data available. Please generate the arrangement first.', 'danger')
-        return redirect(url_for('index'))
-    
     try:
-        # Get data from session
-        seating_data = session['seating_data']
-        
-        # Create CSV in memory
-        output = BytesIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Room', 'Seat Number', 'Student ID', 'Department'])
-        
-        # Write data
-        for room_name, students in seating_data['rooms'].items():
-            for seat_num, student in enumerate(students, 1):
-                writer.writerow([
-                    room_name,
-                    seat_num,
-                    student['Student_ID'],
-                    student['Department']
-                ])
-        
-        output.seek(0)
-        return send_file(
-            output,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'seating_arrangement_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        )
+        seating_data = get_requested_arrangement()
+        if seating_data is None:
+            raise ValueError('No seating data available. Please generate the arrangement first.')
+        
+        packed = open_arrangement(seating_data)
+        
+        def render(export_path):
+            with open(export_path, 'w', newline='') as f:
+                f.writelines(stream_csv(packed.iter_rows()))
+        
+        # Rendered once per arrangement (the lookup ID is its content hash), then served from the export cache
+        key = ExportCache.key(seating_data['lookup_id'], 'csv')
+        with metrics.stage('export_csv'):
+            path = export_cache.get_or_render(key, 'csv', render)
+        return send_export(path, key, 'text/csv')
     except Exception as e:
         flash(str(e), 'danger')
         return redirect(url_for('index'))
 
 @app.route('/download/pdf')
 def download_pdf():
-    if 'seating_data' not in session:
-        flash('No seating data available. Please generate the arrangement first.', 'danger')
-        return redirect(url_for('index'))
-    
     try:
-        # Get data from session
-        seating_data = session['seating_data']
-        
-        # Create PDF in memory
-        output = BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=letter)
-        elements = []
-        
-        # Create table data
-        data = [['Room', 'Seat Number', 'Student ID', 'Department']]
-        
-        for room_name, students in seating_data['rooms'].items():
-            for seat_num, student in enumerate(students, 1):
-                data.append([
-                    room_name,
-                    str(seat_num),
-                    student['Student_ID'],
-                    student['Department']
-                ])
-        
-        # Create table
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        elements.append(table)
-        doc.build(elements)
-        
-        output.seek(0)
-        return send_file(
-            output,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'seating_arrangement_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        )
+        seating_data = get_requested_arrangement()
+        if seating_data is None:
+            raise ValueError('No seating data available. Please generate the arrangement first.')
+        
+        bundle = request.args.get('bundle', 'pdf')
+        if bundle not in ('pdf', 'zip'):
+            raise ValueError("Invalid bundle type")
+        
+        workers = app.config['PDF_EXPORT_WORKERS']
+        rows_per_page = app.config['PDF_ROWS_PER_PAGE']
+        with_seat_maps = request.args.get('seat_maps') == '1'
+        packed = open_arrangement(seating_data)
+        
+        def render(export_path):
+            # Render room by room into the cache's temporary file
+            rooms = expand_rooms(packed.to_compact())
+            
+            # Optional visual seat map page after each room's table
+            seat_maps = department_colors = None
+            if with_seat_maps:
+                layouts = {room.name: room for room in manager_for(seating_data).rooms}
+                seat_maps = generate_seat_map(rooms, seating_data['seats_per_room'], layouts=layouts)
+                department_colors = generate_department_colors(seating_data['departments'])
+            
+            if bundle == 'zip':
+                write_pdf_zip(render_room_pdfs(rooms, workers, rows_per_page, seat_maps, department_colors),
+                              export_path)
+            elif workers > 1 and can_merge_pdfs():
+                merge_pdfs(render_room_pdfs(rooms, workers, rows_per_page, seat_maps, department_colors),
+                           export_path)
+            else:
+                write_pdf(rooms, export_path, rows_per_page, seat_maps, department_colors)
+        
+        # Everything that changes the rendered file is part of its key
+        key = ExportCache.key(seating_data['lookup_id'], bundle, rows_per_page, with_seat_maps,
+                              seating_data['departments'], seating_data['seats_per_room'],
+                              seating_data.get('room_inventory'))
+        with metrics.stage('export_pdf'):
+            path = export_cache.get_or_render(key, bundle, render)
+        return send_export(path, key, 'application/zip' if bundle == 'zip' else 'application/pdf')
     except Exception as e:
         flash(str(e), 'danger')
         return redirect(url_for('index'))
 
+@app.route('/seats/<key>/<path:student_id>')
+def find_seat(key, student_id):
+    """Return the room and seat of one student in a published arrangement"""
+    index = packed_arrangements.get(key)
+    if index is None:
+        return jsonify({'error': 'Arrangement not found'}), 404
+    seat = index.find(student_id)
+    if seat is None:
+        return jsonify({'error': 'Student not found'}), 404
+    response = jsonify({'student_id': seat[0], 'room': seat[1], 'seat': seat[2]})
+    # Published arrangements never change, so shared caches may keep answers
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response
+
+@app.route('/seats/<key>')
+def search_seats(key):
+    """Return the seats of students whose ID starts with ?prefix= (at most ?limit=, up to 50)"""
+    index = packed_arrangements.get(key)
+    if index is None:
+        return jsonify({'error': 'Arrangement not found'}), 404
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix:
+        return jsonify({'error': 'A prefix is required'}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    matches, truncated = index.prefix(prefix, limit)
+    response = jsonify({'matches': [{'student_id': student_id, 'room': room, 'seat': seat}
+                                    for student_id, room, seat in matches],
+                        'truncated': truncated})
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response
+
 @app.route('/clear-session')
 def clear_session():
     # Also remove any files associated with the session
     try:
-        if 'seating_data' in session and 'filename' in session['seating_data']:
-            filename = session['seating_data']['filename']
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
+        seating_data = get_session_arrangement()
+        if seating_data is not None:
+            arrangement_store.delete(session['session_id'])
+            if 'filename' in seating_data:
+                upload_janitor.delete([seating_data['filename']])
+        # Every other file this session uploaded (rosters, room inventories, sample data)
+        if 'upload_owner' in session:
+            upload_janitor.release(session['upload_owner'])
     except Exception as e:
         app.logger.error(f"Error removing file: {str(e)}")
     
@@ -576,7 +1302,12 @@ def manual():
 
 @app.route('/test-prediction', methods=['GET'])
 def test_prediction():
-    """Test endpoint to demonstrate rule-based attendance prediction"""
+    """Test endpoint to demonstrate rule-based attendance prediction (?rule_set= picks the rules)"""
+    rule_set = request.args.get('rule_set', app.config['PREDICTION_RULE_SET'])
+    if rule_set not in prediction_rules:
+        return jsonify({'error': f"Unknown rule set: {rule_set}",
+                        'rule_sets': list(prediction_rules)}), 400
+    
     # Create some sample student data
     sample_data = {
         'Student_ID': ['STU001', 'STU002', 'STU003', 'STU004', 'STU005'],
@@ -589,7 +1320,7 @@ def test_prediction():
     df = pd.DataFrame(sample_data)
     
     # Apply prediction
-    result = predict_attendance(df)
+    result = predict_attendance(df, rule_set)
     
     # Convert to dictionary for JSON response
     prediction_result = {
@@ -597,17 +1328,25 @@ def test_prediction():
         'prediction_result': result[['Student_ID', 'Department', 'Year', 
                                     'Past_Attendance', 'Attendance_Probability', 
                                     'Predicted_Attendance']].to_dict(orient='records'),
-        'rules_applied': [
-            'Students with past attendance > 0.8 are very likely to attend (0.9 probability)',
-            'Students with past attendance between 0.6-0.8 have moderate chance (0.7 probability)',
-            'Students with past attendance < 0.6 have lower chance (0.5 probability)',
-            'Seniors (higher year of study) get a bonus of 0.02 per year',
-            'Students with final probability > 0.65 are predicted to attend'
-        ]
+        'rule_set': rule_set,
+        'rule_sets': list(prediction_rules),
+        'rules_applied': prediction_rules[rule_set].describe()
     }
     
     return jsonify(prediction_result)
 
+# Startup report: how long importing the app took and which heavy modules it loaded
+startup_report = {
+    'import_ms': round((time.perf_counter() - _import_started) * 1000, 1),
+    'budget_ms': app.config['STARTUP_BUDGET_MS'],
+    'loaded_modules': loaded_modules()
+}
+metrics.observe('startup_seconds', startup_report['import_ms'] / 1000)
+if app.config['STARTUP_BUDGET_MS'] and startup_report['import_ms'] > app.config['STARTUP_BUDGET_MS']:
+    app.logger.warning(f"Startup took {startup_report['import_ms']:.0f} ms, over the "
+                       f"{app.config['STARTUP_BUDGET_MS']} ms budget "
+                       f"(heavy modules loaded: {', '.join(startup_report['loaded_modules']) or 'none'})")
+
 # For Vercel serverless deployment
 if __name__ == '__main__':
     # Only run the app directly when not on Vercel
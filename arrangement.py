@@ -0,0 +1,142 @@
+"""Array-backed seating arrangements.
+
+An ArrayArrangement keeps the placed students as integer-coded columns sorted
+by room and seat instead of lists of per-student dicts. Room listings and
+export rows are derived from those arrays only when they are needed.
+
+The compact form (a department dictionary plus per-room student ID and
+department code lists) is what gets stored per session and sent to clients.
+Incremental updates can leave a seat empty rather than move the students
+behind it; such a seat has department code VACANT and student ID None.
+"""
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+VACANT = -1
+
+
+def shuffled_departments(df, rng=None):
+    """Return the frame's departments as a Categorical and the shuffled order students are placed in"""
+    return pd.Categorical(df['Department']), (rng or np.random).permutation(len(df))
+
+
+class ArrayArrangement:
+    def __init__(self, student_ids, department_codes, departments, room_index, all_room_names):
+        self.student_ids = student_ids
+        self.department_codes = department_codes
+        self.departments = departments
+        self.room_index = room_index
+        self.all_room_names = all_room_names
+
+        counts = np.bincount(room_index, minlength=len(all_room_names))
+        self.room_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.room_names = [name for name, count in zip(all_room_names, counts) if count]
+        self._room_lookup = {name: i for i, name in enumerate(all_room_names)}
+
+    @classmethod
+    def from_frame(cls, df, manager, rng=None):
+        """Shuffle and place a Student_ID/Department frame using the manager's engine"""
+        categories, order = shuffled_departments(df, rng)
+        codes = categories.codes
+        assignments = manager.place(codes[order].tolist())
+        room_index = np.fromiter((-1 if room is None else room for room in assignments),
+                                 dtype=np.int32, count=len(assignments))
+
+        # Group students by room while keeping placement order as seat order
+        placed = room_index >= 0
+        rows = order[placed]
+        room_index = room_index[placed]
+        by_room = np.argsort(room_index, kind='stable')
+        rows = rows[by_room]
+
+        return cls(df['Student_ID'].to_numpy()[rows],
+                   codes[rows],
+                   categories.categories.tolist(),
+                   room_index[by_room],
+                   manager.room_names)
+
+    def __len__(self):
+        return len(self.room_index)
+
+    def reordered(self, order):
+        """Return a copy with students moved to new seats, keeping room sizes"""
+        return ArrayArrangement(self.student_ids[order], self.department_codes[order],
+                                self.departments, self.room_index, self.all_room_names)
+
+    def room_bounds(self, room):
+        """Return the (start, stop) positions of a room's students"""
+        i = self._room_lookup[room]
+        return int(self.room_offsets[i]), int(self.room_offsets[i + 1])
+
+    def room_students(self, room):
+        """Return the student IDs and department names seated in a room"""
+        start, stop = self.room_bounds(room)
+        ids = self.student_ids[start:stop].tolist()
+        depts = [self.departments[code] for code in self.department_codes[start:stop]]
+        return ids, depts
+
+    def rooms(self):
+        """Materialize the arrangement as room name -> list of student dicts"""
+        rooms = {}
+        for room in self.room_names:
+            ids, depts = self.room_students(room)
+            rooms[room] = [{'Student_ID': student_id, 'Department': dept}
+                           for student_id, dept in zip(ids, depts)]
+        return rooms
+
+    def compact_room(self, room):
+        """Return a room's student IDs and department codes as parallel lists"""
+        start, stop = self.room_bounds(room)
+        return {
+            'student_ids': self.student_ids[start:stop].tolist(),
+            'department_codes': self.department_codes[start:stop].tolist()
+        }
+
+    def to_compact(self):
+        """Return the department dictionary plus integer-coded per-room arrays"""
+        return {
+            'departments': self.departments,
+            'rooms': {room: self.compact_room(room) for room in self.room_names}
+        }
+
+    def iter_rows(self):
+        """Yield (room, seat number, student ID, department) in seating order"""
+        for room in self.room_names:
+            ids, depts = self.room_students(room)
+            for seat_num, (student_id, dept) in enumerate(zip(ids, depts), 1):
+                yield room, seat_num, student_id, dept
+
+
+def compact_rooms(rooms):
+    """Encode a room name -> student dicts mapping in the compact form of to_compact"""
+    codes = {}
+    compact = {}
+    for room, students in rooms.items():
+        compact[room] = {
+            'student_ids': [student['Student_ID'] for student in students],
+            'department_codes': [codes.setdefault(student['Department'], len(codes))
+                                 for student in students]
+        }
+    return {'departments': list(codes), 'rooms': compact}
+
+
+def expand_rooms(compact):
+    """Decode a compact arrangement back into room name -> student dicts (blank for vacant seats)"""
+    departments = compact['departments']
+    return {
+        room: [{'Student_ID': student_id, 'Department': departments[code]} if code != VACANT
+               else {'Student_ID': '', 'Department': ''}
+               for student_id, code in zip(data['student_ids'], data['department_codes'])]
+        for room, data in compact['rooms'].items()
+    }
+
+
+def department_counts(compact):
+    """Count the seated students of each department in a compact arrangement"""
+    counts = np.zeros(len(compact['departments']), dtype=np.int64)
+    for data in compact['rooms'].values():
+        codes = np.asarray(data['department_codes'], dtype=np.int64)
+        counts += np.bincount(codes[codes != VACANT], minlength=len(counts))
+    return dict(zip(compact['departments'], counts.tolist()))
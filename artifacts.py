@@ -0,0 +1,94 @@
+"""Content-addressed cache of rendered exports.
+
+An export is identified by the SHA-256 of everything that determines its
+contents (the compact arrangement, the format and the rendering options), so
+the same arrangement is rendered once however many times it is downloaded,
+by whichever session. Files are rendered to a temporary name and renamed into
+place, so concurrent requests never serve a half-written export.
+
+The cache folder is kept under max_bytes by deleting the least recently
+served exports (by access time, which get() refreshes). Exports are also
+registered with the upload janitor, so they expire after the same maximum age
+as uploads.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class ExportCache:
+    def __init__(self, folder, max_bytes, metrics, janitor=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self.janitor = janitor
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """Return the content address of an export described by JSON-serializable parts"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def path(self, key, extension):
+        return os.path.join(self.folder, f'{key}.{extension}')
+
+    def get(self, key, extension):
+        """Return the path of a cached export, or None if it has not been rendered"""
+        path = self.path(key, extension)
+        try:
+            # Mark as recently used, keeping the exact modification time the ETag is built from
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_render(self, key, extension, render):
+        """Return the path of an export, calling render(path) to write it on a cache miss"""
+        path = self.get(key, extension)
+        if path is not None:
+            self.metrics.increment('export_cache_hits')
+            return path
+        self.metrics.increment('export_cache_misses')
+
+        fd, temp_path = tempfile.mkstemp(dir=self.folder, prefix='.', suffix=f'.{extension}')
+        os.close(fd)
+        try:
+            render(temp_path)
+            path = self.path(key, extension)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        if self.janitor is not None:
+            self.janitor.track(os.path.relpath(path, self.janitor.folder))
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Delete the least recently served exports until the cache fits in max_bytes"""
+        entries = []
+        with os.scandir(self.folder) as scan:
+            for entry in scan:
+                if entry.name.startswith('.'):  # Still being rendered
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.metrics.increment('exports_evicted')
+            self.metrics.increment('export_bytes_evicted', size)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+"""
+Pipeline Benchmark for Smart Seating Arrangement
+
+Times each stage of the ingest -> predict -> arrange -> export pipeline on
+seeded sample rosters and reports throughput and peak memory per stage:
+
+python benchmark.py --sizes 1000 10000 100000 --departments 12 --skew 1.0
+
+Save a baseline with --save-baseline, then later runs report any stage that
+got slower than the baseline by more than --tolerance and exit with status 1.
+
+--startup instead times cold starts of the serverless entry point (api/index.py)
+in fresh interpreters and exits with status 1 when the fastest one exceeds
+--startup-budget-ms or loads numpy, pandas or reportlab.
+
+--check-placement instead checks, on --placement-cases random inputs, that
+indexed_placement makes exactly the same assignments as scan_placement, and
+exits with status 1 on the first difference.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app import (SeatingManager, generate_sample_data, validate_csv, predict_attendance,
+                 generate_seat_map)
+from export import iter_arrangement_rows, stream_csv, write_pdf
+from placement import scan_placement, indexed_placement
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, 'api')
+import index
+print(json.dumps({'total_ms': (time.perf_counter() - started) * 1000, **index.startup_report}))
+"""
+
+
+def measure(func, repeat):
+    """Return the best wall time over repeat runs and the peak traced memory of one run"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def export_csv(rooms):
+    for _ in stream_csv(iter_arrangement_rows(rooms)):
+        pass
+
+
+def export_pdf(rooms):
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    os.close(fd)
+    try:
+        write_pdf(rooms, path)
+    finally:
+        os.remove(path)
+
+
+def run_size(num_students, args):
+    """Benchmark every pipeline stage for one roster size"""
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    df = generate_sample_data(num_students, seed=args.seed, num_departments=args.departments,
+                              department_skew=args.skew)
+    num_rooms = args.rooms or math.ceil(num_students / args.seats_per_room)
+    manager = SeatingManager(num_rooms, args.seats_per_room, algorithm=args.algorithm)
+
+    predicted = predict_attendance(df)
+    attending = predicted[predicted['Predicted_Attendance'] == 1]
+    students = attending[['Student_ID', 'Department']].to_dict('records')
+    rooms = manager.arrange_seating(students)
+
+    stages = [
+        ('validate_csv', lambda: validate_csv(df), num_students),
+        ('predict_attendance', lambda: predict_attendance(df), num_students),
+        ('arrange_seating', lambda: manager.arrange_seating(students), len(students)),
+        ('arrange_frame', lambda: manager.arrange_frame(attending), len(students)),
+        ('generate_seat_map', lambda: generate_seat_map(rooms, args.seats_per_room), len(students)),
+        ('export_csv', lambda: export_csv(rooms), len(students)),
+    ]
+    if len(students) <= args.max_pdf_students:
+        stages.append(('export_pdf', lambda: export_pdf(rooms), len(students)))
+
+    results = {}
+    for name, func, rows in stages:
+        seconds, peak = measure(func, args.repeat)
+        results[name] = {
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else float('inf'),
+            'peak_mb': peak / (1024 * 1024)
+        }
+    return results
+
+
+def measure_startup(repeat):
+    """Import the serverless entry point in fresh interpreters, returning the fastest startup report"""
+    reports = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        reports.append(json.loads(output.splitlines()[-1]))
+    return min(reports, key=lambda report: report['total_ms'])
+
+
+def check_startup(args):
+    """Report the cold start time and fail when it is over budget or loads heavy modules"""
+    report = measure_startup(args.repeat)
+    print("\n=== Smart Seating Arrangement Startup ===\n")
+    print(f"  import api/index.py  {report['total_ms']:>10.1f} ms (budget {args.startup_budget_ms} ms)")
+    print(f"  import app           {report['import_ms']:>10.1f} ms")
+    print(f"  heavy modules loaded {', '.join(report['loaded_modules']) or 'none'}")
+    if report['total_ms'] > args.startup_budget_ms or report['loaded_modules']:
+        print("Startup is over budget.")
+        sys.exit(1)
+    print("Startup is within budget.")
+
+
+def random_placement_case(rng):
+    """Return the arguments of a random placement, with uneven rooms and a partly filled start state"""
+    num_rooms = rng.randint(1, 12)
+    department_buffer = rng.randint(0, 4)
+    if rng.random() < 0.5:
+        seats_per_room = rng.randint(1, 15)
+        capacities = [seats_per_room] * num_rooms
+    else:
+        seats_per_room = capacities = [rng.randint(0, 15) for _ in range(num_rooms)]
+    num_departments = rng.randint(1, 8)
+    departments = [rng.randrange(num_departments) for _ in range(rng.randint(0, sum(capacities) + 10))]
+    occupancy = history = None
+    if rng.random() < 0.3:
+        occupancy = [rng.randint(0, capacity) for capacity in capacities]
+        history = [[rng.randrange(num_departments) for _ in range(rng.randint(0, department_buffer))]
+                   for _ in range(num_rooms)]
+    return departments, num_rooms, seats_per_room, department_buffer, occupancy, history
+
+
+def check_placement(args):
+    """Check that indexed_placement agrees with scan_placement on random inputs"""
+    rng = random.Random(args.seed)
+    for case in range(args.placement_cases):
+        placement_args = random_placement_case(rng)
+        expected = scan_placement(*placement_args)
+        actual = indexed_placement(*placement_args)
+        if actual != expected:
+            print(f"Case {case}: indexed_placement differs from scan_placement")
+            print(f"  arguments {placement_args}")
+            print(f"  expected  {expected}")
+            print(f"  actual    {actual}")
+            sys.exit(1)
+    print(f"indexed_placement matches scan_placement on {args.placement_cases} random cases.")
+
+
+def compare(results, baseline, tolerance):
+    """Return (size, stage, baseline seconds, current seconds) for every regression"""
+    regressions = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if previous and result['seconds'] > previous['seconds'] * (1 + tolerance):
+                regressions.append((size, stage, previous['seconds'], result['seconds']))
+    return regressions
+
+
+def main():
+    """Run the benchmark and report results."""
+    parser = argparse.ArgumentParser(description='Benchmark the seating pipeline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='roster sizes to benchmark (default: 1000 10000)')
+    parser.add_argument('--departments', type=int, default=5, help='number of departments')
+    parser.add_argument('--skew', type=float, default=0.0,
+                        help='department skew, 0 for uniform (default: 0)')
+    parser.add_argument('--rooms', type=int, default=0,
+                        help='number of rooms (default: enough for every student)')
+    parser.add_argument('--seats-per-room', type=int, default=60)
+    parser.add_argument('--algorithm', default='indexed', help='placement engine')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (best is kept)')
+    parser.add_argument('--max-pdf-students', type=int, default=50000,
+                        help='skip the PDF export above this many seated students')
+    parser.add_argument('--baseline', default='benchmark_baseline.json')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--startup', action='store_true',
+                        help='check the cold start time of api/index.py instead of the pipeline')
+    parser.add_argument('--startup-budget-ms', type=float, default=500,
+                        help='cold start budget for --startup (default: 500)')
+    parser.add_argument('--check-placement', action='store_true',
+                        help='check indexed_placement against scan_placement instead of benchmarking')
+    parser.add_argument('--placement-cases', type=int, default=3000,
+                        help='random cases for --check-placement (default: 3000)')
+    args = parser.parse_args()
+
+    if args.startup:
+        check_startup(args)
+        return
+
+    if args.check_placement:
+        check_placement(args)
+        return
+
+    print("\n=== Smart Seating Arrangement Pipeline Benchmark ===\n")
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run_size(size, args)
+        print(f"{size} students")
+        for stage, result in results[str(size)].items():
+            print(f"  {stage:<20} {result['seconds'] * 1000:>10.1f} ms"
+                  f" {result['rows_per_second']:>14,.0f} rows/s"
+                  f" {result['peak_mb']:>9.1f} MB peak")
+        print()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for size, stage, before, after in regressions:
+                print(f"  {size} students, {stage}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
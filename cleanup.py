@@ -0,0 +1,155 @@
+"""Background expiry of uploaded files.
+
+Uploads (rosters, room inventories, generated sample data) are registered
+with the janitor when they are saved, together with the session that owns
+them. A daemon thread wakes up every interval and deletes the uploads older
+than the maximum age, popping them off a heap ordered by expiry time, so a
+sweep only touches files that have actually expired and requests never scan
+the upload folder.
+
+Files nobody registered (left over from before a restart, or saved by another
+worker process) are picked up by a directory rescan when the thread starts
+and every rescan interval after that, aged by their modification time. The
+rescan also covers the given subfolders, such as the export cache.
+
+Reclaimed files and bytes are counted in the metrics as uploads_reclaimed and
+upload_bytes_reclaimed, labelled with the reason (expired or session).
+"""
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+
+from ingest import roster_cache_path
+
+
+class UploadJanitor:
+    def __init__(self, folder, max_age_seconds, metrics, interval_seconds=600, rescan_seconds=3600,
+                 logger=None, subfolders=()):
+        self.folder = folder
+        self.subfolders = subfolders
+        self.max_age_seconds = max_age_seconds
+        self.metrics = metrics
+        self.interval_seconds = interval_seconds
+        self.rescan_seconds = rescan_seconds
+        self.logger = logger
+        self._files = {}  # filename -> (expires, owner)
+        self._owners = defaultdict(set)
+        self._expiry = []  # Min-heap of (expires, filename), possibly with stale entries
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track(self, filename, owner=None, created=None):
+        """Register an upload (a path relative to the folder), owned by a session if owner is given"""
+        expires = (time.time() if created is None else created) + self.max_age_seconds
+        with self._lock:
+            self._forget(filename)
+            self._files[filename] = (expires, owner)
+            if owner is not None:
+                self._owners[owner].add(filename)
+            heapq.heappush(self._expiry, (expires, filename))
+        self.metrics.increment('uploads_tracked')
+
+    def _forget(self, filename):
+        # Heap entries of forgotten files are skipped when they come up
+        entry = self._files.pop(filename, None)
+        if entry is not None and entry[1] is not None:
+            owned = self._owners[entry[1]]
+            owned.discard(filename)
+            if not owned:
+                del self._owners[entry[1]]
+
+    def owned(self, owner):
+        """Return the filenames of the uploads owned by a session"""
+        with self._lock:
+            return sorted(self._owners.get(owner, ()))
+
+    def delete(self, filenames, reason='session'):
+        """Delete uploads now, returning the number of files and bytes reclaimed"""
+        with self._lock:
+            for filename in filenames:
+                self._forget(filename)
+        return self._reclaim(filenames, reason)
+
+    def release(self, owner):
+        """Delete every upload owned by a session"""
+        return self.delete(self.owned(owner))
+
+    def sweep(self, now=None):
+        """Delete the uploads that have expired, returning the number of files and bytes reclaimed"""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires, filename = heapq.heappop(self._expiry)
+                entry = self._files.get(filename)
+                if entry is None or entry[0] != expires:
+                    continue  # Deleted or registered again since
+                self._forget(filename)
+                expired.append(filename)
+        return self._reclaim(expired, 'expired')
+
+    def rescan(self):
+        """Register the files in the upload folder and its subfolders that are not tracked yet"""
+        found = []
+        for subfolder in ('', *self.subfolders):
+            folder = os.path.join(self.folder, subfolder)
+            if not os.path.isdir(folder):
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            found.append((os.path.join(subfolder, entry.name), entry.stat().st_mtime))
+                    except FileNotFoundError:
+                        continue
+        with self._lock:
+            untracked = [(filename, mtime) for filename, mtime in found if filename not in self._files]
+        for filename, mtime in untracked:
+            self.track(filename, created=mtime)
+        return len(untracked)
+
+    def _reclaim(self, filenames, reason):
+        files = size = 0
+        for filename in filenames:
+            filepath = os.path.join(self.folder, filename)
+            # The columnar roster cache written next to an upload goes with it
+            for path in (filepath, roster_cache_path(filepath)):
+                try:
+                    path_size = os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                files += 1
+                size += path_size
+        if files:
+            self.metrics.increment('uploads_reclaimed', files, reason=reason)
+            self.metrics.increment('upload_bytes_reclaimed', size, reason=reason)
+        return files, size
+
+    def start(self):
+        """Start the background sweeper thread, once"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='upload-janitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Ask the sweeper thread to exit after its current pass"""
+        self._stop.set()
+
+    def _run(self):
+        next_rescan = 0
+        while True:
+            try:
+                with self.metrics.timer('upload_sweep_seconds'):
+                    if time.time() >= next_rescan:
+                        self.rescan()
+                        next_rescan = time.time() + self.rescan_seconds
+                    self.sweep()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Error during upload cleanup: {str(e)}")
+            if self._stop.wait(self.interval_seconds):
+                return
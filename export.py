@@ -0,0 +1,183 @@
+"""CSV and PDF exports of seating arrangements.
+
+CSV exports are produced as a generator of text batches, written row by row
+into the export file. PDF exports are drawn one page-sized table at a time onto
+a canvas backed by that file.
+
+Rooms can also be rendered to standalone PDFs in a process pool and then
+merged into one document (requires the optional pypdf package) or bundled
+into a ZIP with one PDF per room.
+
+reportlab is imported by the PDF functions when they first run, so CSV
+exports and the rest of the app never pay for loading it.
+"""
+import csv
+import importlib.util
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO, StringIO
+
+EXPORT_HEADER = ['Room', 'Seat Number', 'Student ID', 'Department']
+
+
+@lru_cache(maxsize=None)
+def table_style():
+    """Return the style of the PDF seat tables"""
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+
+
+def iter_arrangement_rows(rooms):
+    """Yield (room, seat number, student ID, department) for a room mapping"""
+    for room_name, students in rooms.items():
+        for seat_num, student in enumerate(students, 1):
+            yield room_name, seat_num, student['Student_ID'], student['Department']
+
+
+def stream_csv(rows, batch_size=1000):
+    """Yield the CSV export as text in batches of rows"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def new_canvas(output):
+    """Open a compressed letter-size PDF canvas on a file or stream"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    return canvas.Canvas(output, pagesize=letter, pageCompression=1)
+
+
+def draw_room_pages(pdf, room_name, rows, rows_per_page=30, pagesize=None):
+    """Draw a room's seat table onto the canvas, one page per chunk of rows"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table
+
+    width, height = pagesize or letter
+    for start in range(0, len(rows), rows_per_page):
+        pdf.setFont('Helvetica-Bold', 16)
+        pdf.drawString(inch, height - 0.75 * inch, room_name)
+
+        table = Table([EXPORT_HEADER] + [[str(value) for value in row]
+                                         for row in rows[start:start + rows_per_page]])
+        table.setStyle(table_style())
+        table_width, table_height = table.wrapOn(pdf, width - 2 * inch, height - 2 * inch)
+        table.drawOn(pdf, (width - table_width) / 2, height - inch - table_height)
+        pdf.showPage()
+
+
+def draw_seat_map_page(pdf, room_name, seat_map, department_colors, pagesize=None):
+    """Draw a room's seat grid coloured by department on its own page"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+
+    width, height = pagesize or letter
+    rows = seat_map['seats']
+    columns = max((seat['column'] for row in rows for seat in row), default=1)
+    depth = max((seat['row'] for row in rows for seat in row), default=1)
+    cell = min((width - 2 * inch) / columns, (height - 2 * inch) / depth, inch)
+    font_size = max(min(cell / 6, 9), 3)
+
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawString(inch, height - 0.75 * inch, f'{room_name} seat map')
+    left = (width - cell * columns) / 2
+    top = height - inch
+    for row in rows:
+        for seat in row:
+            x = left + (seat['column'] - 1) * cell
+            y = top - seat['row'] * cell
+            pdf.setFillColor(colors.HexColor(department_colors.get(seat['department'], '#CCCCCC')))
+            pdf.rect(x + 2, y + 2, cell - 4, cell - 4, fill=1, stroke=1)
+            pdf.setFillColor(colors.black)
+            pdf.setFont('Helvetica', font_size)
+            pdf.drawCentredString(x + cell / 2, y + cell / 2 + font_size / 2, f"Seat {seat['seat_number']}")
+            pdf.drawCentredString(x + cell / 2, y + cell / 2 - font_size, str(seat['student_id']))
+    pdf.showPage()
+
+
+def draw_room(pdf, room_name, students, rows_per_page=30, seat_map=None, department_colors=None):
+    """Draw a room's seat table pages, followed by its seat map when given"""
+    rows = [(room_name, seat_num, student['Student_ID'], student['Department'])
+            for seat_num, student in enumerate(students, 1)]
+    draw_room_pages(pdf, room_name, rows, rows_per_page)
+    if seat_map is not None:
+        draw_seat_map_page(pdf, room_name, seat_map, department_colors or {})
+
+
+def write_pdf(rooms, output, rows_per_page=30, seat_maps=None, department_colors=None):
+    """Render the arrangement to a PDF file or stream, one room at a time"""
+    pdf = new_canvas(output)
+    for room_name, students in rooms.items():
+        seat_map = seat_maps[room_name] if seat_maps else None
+        draw_room(pdf, room_name, students, rows_per_page, seat_map, department_colors)
+    pdf.save()
+
+
+def render_room_pdf(task):
+    """Render one room to a standalone PDF, returning (room name, PDF bytes)"""
+    room_name, students, rows_per_page, seat_map, department_colors = task
+    output = BytesIO()
+    pdf = new_canvas(output)
+    draw_room(pdf, room_name, students, rows_per_page, seat_map, department_colors)
+    pdf.save()
+    return room_name, output.getvalue()
+
+
+def render_room_pdfs(rooms, workers, rows_per_page=30, seat_maps=None, department_colors=None):
+    """Yield (room name, PDF bytes) per room, rendered across a process pool"""
+    tasks = [(room_name, students, rows_per_page,
+              seat_maps[room_name] if seat_maps else None, department_colors)
+             for room_name, students in rooms.items()]
+    if workers <= 1 or len(tasks) <= 1:
+        yield from map(render_room_pdf, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(render_room_pdf, tasks)
+
+
+def can_merge_pdfs():
+    """Return True when the optional pypdf package is installed"""
+    return importlib.util.find_spec('pypdf') is not None
+
+
+def merge_pdfs(room_pdfs, output):
+    """Merge per-room PDFs, in order, into a single document"""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for _, data in room_pdfs:
+        writer.append(BytesIO(data))
+    writer.write(output)
+
+
+def write_pdf_zip(room_pdfs, output):
+    """Bundle per-room PDFs into a ZIP archive"""
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for room_name, data in room_pdfs:
+            archive.writestr(f'{room_name}.pdf', data)
@@ -0,0 +1,230 @@
+"""Streaming roster ingestion.
+
+Uploaded CSV files are read in chunks and validated chunk by chunk, failing on
+the first bad chunk. The validated columns (plus an optional Exam_Slot column)
+are written next to the upload as a compact typed .npz cache that the
+processing step loads instead of parsing the CSV text again.
+
+Parsed, prediction-augmented rosters are additionally kept in memory keyed by
+the SHA-256 of the uploaded file, so regenerating an arrangement for the same
+roster with different room parameters only re-runs the seating step.
+
+Bulk uploads (several CSV files, or ZIP archives of them) are validated in a
+thread pool, since the CSV parser does most of its work without holding the
+GIL, and merged into a single roster. Student_IDs are checked across files
+with a hash index so a student listed by two departments is reported instead
+of being seated twice.
+"""
+import hashlib
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+REQUIRED_COLUMNS = ['Student_ID', 'Department', 'Year', 'Past_Attendance']
+OPTIONAL_COLUMNS = ['Exam_Slot']
+ROSTER_CACHE_SUFFIX = '.roster.npz'
+
+
+def validate_chunk(df, row_offset=0):
+    """Validate the columns, values and types of one block of roster rows"""
+    required_columns = set(REQUIRED_COLUMNS)
+
+    # Check required columns
+    if not required_columns.issubset(df.columns):
+        missing = required_columns - set(df.columns)
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    # Check for empty values
+    for col in REQUIRED_COLUMNS:
+        nulls = df[col].isnull().to_numpy()
+        if nulls.any():
+            raise ValueError(f"Column '{col}' contains empty values "
+                             f"(row {row_offset + int(nulls.argmax()) + 1})")
+
+    # Validate data types
+    if not pd.api.types.is_numeric_dtype(df['Year']):
+        raise ValueError("'Year' column must contain numeric values")
+    if not pd.api.types.is_numeric_dtype(df['Past_Attendance']):
+        raise ValueError("'Past_Attendance' column must contain numeric values")
+
+    # Validate value ranges
+    in_range = df['Past_Attendance'].between(0, 1).to_numpy()
+    if not in_range.all():
+        raise ValueError("'Past_Attendance' values must be between 0 and 1 "
+                         f"(row {row_offset + int(in_range.argmin()) + 1})")
+
+
+def _combine(parts):
+    """Concatenate per-chunk column arrays, falling back to text on mixed types"""
+    if len({part.dtype.kind for part in parts}) > 1:
+        parts = [part.astype(str) for part in parts]
+    return np.concatenate(parts)
+
+
+def _column_array(series):
+    """Convert a column to a plain numpy array that can be saved without pickling"""
+    if series.dtype.kind in 'biuf':
+        return series.to_numpy()
+    return series.astype(str).to_numpy(dtype=str)
+
+
+def roster_cache_path(filepath):
+    """Return the path of the columnar cache written for an uploaded CSV"""
+    return filepath + ROSTER_CACHE_SUFFIX
+
+
+def read_csv_columns(source, chunksize=50000):
+    """Stream and validate a roster CSV (path or file object), returning its kept columns as arrays"""
+    columns = None
+    rows = 0
+
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        validate_chunk(chunk, rows)
+        if columns is None:
+            kept = REQUIRED_COLUMNS + [col for col in OPTIONAL_COLUMNS if col in chunk.columns]
+            columns = {col: [] for col in kept}
+        for col, parts in columns.items():
+            parts.append(_column_array(chunk[col]))
+        rows += len(chunk)
+
+    # Validate minimum number of rows
+    if rows < 1:
+        raise ValueError("CSV file must contain at least one row of data")
+
+    return {col: _combine(parts) for col, parts in columns.items()}
+
+
+def ingest_csv(filepath, chunksize=50000):
+    """Stream, validate and cache a roster CSV, returning the validated frame"""
+    arrays = read_csv_columns(filepath, chunksize)
+    np.savez(roster_cache_path(filepath), **arrays)
+    return pd.DataFrame(arrays)
+
+
+def write_roster(df, filepath):
+    """Save a validated roster as CSV together with its columnar cache"""
+    df.to_csv(filepath, index=False)
+    np.savez(roster_cache_path(filepath), **{col: _column_array(df[col]) for col in df.columns})
+
+
+def load_roster(filepath, chunksize=50000):
+    """Load a roster from its columnar cache, ingesting the CSV if needed"""
+    cache_path = roster_cache_path(filepath)
+    if os.path.exists(cache_path):
+        with np.load(cache_path, allow_pickle=False) as data:
+            return pd.DataFrame({col: data[col] for col in data.files})
+    return ingest_csv(filepath, chunksize)
+
+
+def zip_csv_members(data, max_bytes):
+    """Return (name, bytes) for each CSV file in a ZIP archive, refusing more than max_bytes uncompressed"""
+    try:
+        archive = zipfile.ZipFile(BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ValueError("Invalid ZIP archive")
+    with archive:
+        members = [info for info in archive.infolist()
+                   if not info.is_dir() and info.filename.lower().endswith('.csv')
+                   and not info.filename.startswith('__MACOSX/')]
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ValueError(f"ZIP archive expands to more than {max_bytes // (1024 * 1024)} MB of CSV files")
+        return [(info.filename, archive.read(info)) for info in members]
+
+
+def _read_source(task):
+    name, data, chunksize = task
+    try:
+        return pd.DataFrame(read_csv_columns(BytesIO(data), chunksize))
+    except Exception as e:
+        raise ValueError(f"{name}: {e}")
+
+
+def read_rosters(sources, workers=4, chunksize=50000):
+    """Validate (name, CSV bytes) sources in a thread pool, returning name -> frame in order"""
+    tasks = [(name, data, chunksize) for name, data in sources]
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            frames = list(executor.map(_read_source, tasks))
+    else:
+        frames = [_read_source(task) for task in tasks]
+    return dict(zip((name for name, _ in sources), frames))
+
+
+def merge_rosters(frames, max_reported=10):
+    """Concatenate validated rosters, rejecting Student_IDs listed more than once
+
+    frames maps source names to frames. Optional columns are kept only when
+    every roster has them.
+    """
+    first_seen = {}
+    duplicates = []
+    for source, df in frames.items():
+        for student_id in df['Student_ID'].astype(str).tolist():
+            if student_id in first_seen:
+                duplicates.append(f"{student_id} ({first_seen[student_id]}, {source})")
+            else:
+                first_seen[student_id] = source
+    if duplicates:
+        more = f" and {len(duplicates) - max_reported} more" if len(duplicates) > max_reported else ''
+        raise ValueError(f"Duplicate Student_ID values: {'; '.join(duplicates[:max_reported])}{more}")
+
+    columns = REQUIRED_COLUMNS + [col for col in OPTIONAL_COLUMNS
+                                  if all(col in df.columns for df in frames.values())]
+    return pd.concat([df[columns] for df in frames.values()], ignore_index=True)
+
+
+def file_digest(filepath, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RosterCache:
+    """Size-bounded LRU cache of parsed rosters keyed by content hash"""
+
+    def __init__(self, ttl_seconds, max_bytes):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, size, df = entry
+            if expires <= time.time():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return df
+
+    def set(self, key, df):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (time.time() + self.ttl_seconds, size, df)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
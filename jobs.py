@@ -0,0 +1,53 @@
+"""Background job queue for arrangement generation.
+
+Jobs run on a local thread pool, so no external broker is needed. The queue
+only tracks job status; jobs store their results themselves (for arrangements,
+in the arrangement store under the job's ID).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueue:
+    def __init__(self, workers=2, ttl_seconds=3600):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='seating-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) to run in the background under job_id"""
+        self._prune()
+        job = {'id': job_id, 'status': 'queued', 'error': None,
+               'created': time.time(), 'started': None, 'finished': None}
+        with self._lock:
+            self._jobs[job_id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job_id
+
+    def _run(self, job, func, args, kwargs):
+        job['status'] = 'running'
+        job['started'] = time.time()
+        try:
+            func(*args, **kwargs)
+            job['status'] = 'done'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['finished'] = time.time()
+
+    def status(self, job_id):
+        """Return a copy of a job's status, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished'] and job['finished'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
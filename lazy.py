@@ -0,0 +1,51 @@
+"""Deferred imports of heavy dependencies.
+
+numpy and pandas take most of the time of a cold start, yet health checks and
+static pages need neither. Modules bind them with lazy_import, which returns a
+stand-in module right away and only imports the real one on first attribute
+access, so each subsystem pays for its dependencies the first time it is
+actually used. reportlab is imported inside the PDF export functions instead.
+
+The first load goes through the regular import system under a lock, so
+threads that touch a stand-in at the same time (bulk upload workers, job
+threads, threaded servers) all wait for the one complete import.
+importlib.util.LazyLoader is not used because it is not thread-safe before
+Python 3.12.
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+HEAVY_MODULES = ('numpy', 'pandas', 'reportlab')
+
+_load_lock = threading.RLock()
+
+
+class _DeferredModule(types.ModuleType):
+    def __getattr__(self, attr):
+        # Only reached for attributes not copied in yet, so loaded modules cost nothing extra
+        with _load_lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return a module that is only imported when one of its attributes is first used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return _DeferredModule(name)
+
+
+def is_loaded(name):
+    """Return True if a module has been imported"""
+    return name in sys.modules
+
+
+def loaded_modules(names=HEAVY_MODULES):
+    """Return which of the given modules have been loaded so far"""
+    return [name for name in names if is_loaded(name)]
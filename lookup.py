@@ -0,0 +1,53 @@
+"""Student seat lookup.
+
+Arrangements are published under a content-derived lookup ID, as packed
+files (see packed.py) whose sorted table of normalized Student_IDs answers
+exact and prefix queries with a binary search over the memory-mapped file,
+without a session or the uploaded roster. Student IDs are matched ignoring
+case and surrounding whitespace. Each worker keeps its most recently used
+arrangements open in a small LRU cache, checking on every hit that the file
+is still there so expired arrangements stop answering.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def lookup_id(compact):
+    """Return the public lookup ID of a compact arrangement"""
+    return hashlib.sha256(json.dumps(compact, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def normalize(student_id):
+    return str(student_id).strip().casefold()
+
+
+class SeatIndexCache:
+    """LRU cache of seat indexes by lookup ID, opened on demand by a loader"""
+
+    def __init__(self, load, max_entries=32):
+        self.load = load  # lookup ID -> seat index (with find, prefix and is_current), or None
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the seat index of an arrangement, or None if it is not published"""
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                # An arrangement whose file expired (or was rewritten) is dropped, not served from memory
+                if index.is_current():
+                    self._entries.move_to_end(key)
+                    return index
+                del self._entries[key]
+
+        index = self.load(key)
+        if index is None:
+            return None
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
@@ -0,0 +1,131 @@
+"""In-process metrics and request profiling.
+
+Metrics collects timers (count, sum and max seconds) and counters keyed by
+metric name and labels, and renders them in the Prometheus text exposition
+format. RequestProfiler optionally runs cProfile around each request and keeps
+the reports of the slowest requests.
+"""
+import cProfile
+import heapq
+import io
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Metrics:
+    def __init__(self, prefix='seating'):
+        self.prefix = prefix
+        self._timers = defaultdict(lambda: [0, 0.0, 0.0])  # count, sum, max
+        self._counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        """Record one timed observation"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            timer = self._timers[key]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed_iter(self, iterable, name, **labels):
+        """Yield from an iterable, timing it until exhausted (for streamed responses)"""
+        with self.timer(name, **labels):
+            yield from iterable
+
+    def stage(self, stage):
+        """Time one step of the seating pipeline"""
+        return self.timer('stage_seconds', stage=stage)
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter"""
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def render(self):
+        """Render every metric in the Prometheus text format"""
+        with self._lock:
+            timers = sorted(self._timers.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), (count, total, peak) in timers:
+            metric = f'{self.prefix}_{name}'
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {metric} summary')
+                lines.append(f'# TYPE {metric}_max gauge')
+            lines.append(f'{metric}_count{_format_labels(labels)} {count}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {total:.6f}')
+            lines.append(f'{metric}_max{_format_labels(labels)} {peak:.6f}')
+        for (name, labels), value in counters:
+            metric = f'{self.prefix}_{name}_total'
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_format_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """Keeps cProfile reports for the slowest requests seen so far"""
+
+    def __init__(self, keep=10, report_lines=30):
+        self.keep = keep
+        self.report_lines = report_lines
+        self._slowest = []  # Min-heap of (seconds, sequence, path, report)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start profiling the current request, or return None if a profiler is busy"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiler is already active (Python 3.12+)
+            return None
+        return profile
+
+    def finish(self, profile, path, seconds):
+        """Stop a profile and keep its report if it is among the slowest"""
+        profile.disable()
+        with self._lock:
+            if len(self._slowest) >= self.keep and seconds <= self._slowest[0][0]:
+                return
+
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(self.report_lines)
+
+        with self._lock:
+            self._sequence += 1
+            entry = (seconds, self._sequence, path, output.getvalue())
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def dump(self):
+        """Return the kept reports, slowest first"""
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return '\n'.join(f'=== {path} ({seconds * 1000:.1f} ms) ===\n{report}'
+                         for seconds, _, path, report in entries)
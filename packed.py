@@ -0,0 +1,288 @@
+"""Compact binary arrangement files, memory-mapped read-only.
+
+A finished arrangement is written once to a file that every worker process
+maps read-only, so the operating system's page cache holds one copy of it
+however many workers serve it, and reading a room or looking up a student
+touches only the pages involved. All sections are plain little-endian arrays,
+each starting on an 8-byte boundary after the header:
+
+    header          magic, version, section sizes and string widths
+    departments     department dictionary, fixed-width UTF-8
+    rooms           room names, fixed-width UTF-8
+    room offsets    int64, num_rooms + 1 (students of room r are offsets[r]:offsets[r + 1])
+    student IDs     fixed-width UTF-8, in room and seat order
+    departments     int32 department codes, in seat order
+    probabilities   float32 attendance probabilities, in seat order (NaN if unknown)
+    lookup keys     normalized student IDs, sorted, fixed-width UTF-8
+    lookup order    int32 seat position of each lookup key
+
+Student IDs are stored as text (see text_student_ids), so callers compare
+them as text too. A vacant seat has department code VACANT and an empty
+student ID, whose empty lookup key sorts first and is never matched. Arrays
+are numpy views straight into the mapping; only the small department and room
+dictionaries are decoded into Python objects when a file is opened.
+"""
+import math
+import mmap
+import os
+import struct
+
+from arrangement import VACANT
+from lazy import lazy_import
+from lookup import normalize
+
+np = lazy_import('numpy')
+
+MAGIC = b'SEATARR\x00'
+VERSION = 1
+# magic, version, departments, department width, rooms, room width, ID width, key width, students
+HEADER = struct.Struct('<8sIIIIIIIQ')
+
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def _text_array(values):
+    """Encode strings as a fixed-width UTF-8 array just wide enough for the longest one"""
+    encoded = [str(value).encode() for value in values]
+    return np.array(encoded, dtype=f'S{max((len(value) for value in encoded), default=1) or 1}')
+
+
+def text_student_ids(compact):
+    """Return a compact arrangement with its student IDs as text, the way packed files store them"""
+    rooms = {room: {**data, 'student_ids': [None if student_id is None else str(student_id)
+                                            for student_id in data['student_ids']]}
+             for room, data in compact['rooms'].items()}
+    return {**compact, 'rooms': rooms}
+
+
+def _write_sections(path, departments, room_names, offsets, ids, codes, probabilities, keys, order):
+    """Write the header and sections of a packed file, renaming it into place when complete"""
+    header = HEADER.pack(MAGIC, VERSION, len(departments), departments.itemsize, len(room_names),
+                         room_names.itemsize, ids.itemsize, keys.itemsize, len(ids))
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        for array in (departments, room_names, offsets, ids, codes, probabilities, keys, order):
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            f.write(array.tobytes())
+    os.replace(temp_path, path)
+
+
+def write_packed(path, compact, probabilities=None):
+    """Write a compact arrangement as a packed file
+
+    probabilities maps student IDs to attendance probabilities; students
+    missing from it are stored as NaN. The file is written under a temporary
+    name and renamed into place, so readers never see a partial file.
+    """
+    rooms = [(room, data) for room, data in text_student_ids(compact)['rooms'].items()]
+    student_ids = [student_id or '' for _, data in rooms for student_id in data['student_ids']]
+    sizes = [len(data['student_ids']) for _, data in rooms]
+
+    offsets = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))).astype('<i8')
+    codes = np.array([code for _, data in rooms for code in data['department_codes']], dtype='<i4')
+    probabilities = {str(student_id): probability for student_id, probability in (probabilities or {}).items()}
+    probabilities = np.array([probabilities.get(student_id, math.nan) for student_id in student_ids], dtype='<f4')
+    keys = _text_array([normalize(student_id) for student_id in student_ids])
+    order = np.argsort(keys, kind='stable').astype('<i4')
+
+    _write_sections(path, _text_array(compact['departments']), _text_array([room for room, _ in rooms]),
+                    offsets, _text_array(student_ids), codes, probabilities, keys[order], order)
+
+
+def write_packed_update(path, base, patch, room_names):
+    """Write a packed file that is base with some of its rooms replaced
+
+    patch is a compact arrangement holding the whole department dictionary
+    (base's departments first) and only the rooms that changed; a changed
+    room without seats is left out. room_names gives the order of all rooms.
+    Unchanged rooms are copied from base's arrays without decoding them and
+    base's sorted lookup table is merged with the changed rooms' keys rather
+    than sorted again, so Python-level work grows with the changed rooms
+    only. Students keep their probability from base; added ones get NaN.
+    """
+    changed = text_student_ids(patch)['rooms']
+    known = {}
+    for room in changed:
+        if room in base:
+            start, stop = base._span(room)
+            known.update(zip(np.char.decode(base.student_ids[start:stop]).tolist(),
+                             base.probabilities[start:stop].tolist()))
+
+    names, ids, codes, probabilities = [], [], [], []
+    new_keys, new_order = [], []
+    remap = np.full(len(base), -1, dtype=np.int64)  # base seat position -> position in the new file
+    position = 0
+    for room in room_names:
+        if room in changed:
+            student_ids = [student_id or '' for student_id in changed[room]['student_ids']]
+            if not student_ids:
+                continue
+            ids.append(_text_array(student_ids))
+            codes.append(np.array(changed[room]['department_codes'], dtype='<i4'))
+            probabilities.append(np.array([known.get(student_id, math.nan) for student_id in student_ids],
+                                          dtype='<f4'))
+            new_keys.extend(normalize(student_id) for student_id in student_ids)
+            new_order.extend(range(position, position + len(student_ids)))
+        elif room in base:
+            start, stop = base._span(room)
+            ids.append(base.student_ids[start:stop])
+            codes.append(base.department_codes[start:stop])
+            probabilities.append(base.probabilities[start:stop])
+            remap[start:stop] = np.arange(position, position + stop - start)
+        else:
+            continue
+        names.append(room)
+        position += len(ids[-1])
+
+    # Base keys of unchanged rooms stay sorted; the changed rooms' keys are inserted among them
+    base_order = remap[base._order]
+    kept = base_order >= 0
+    new_keys = _text_array(new_keys)
+    sort = np.argsort(new_keys, kind='stable')
+    new_keys, new_order = new_keys[sort], np.array(new_order, dtype=np.int64)[sort]
+    width = max(base._keys.itemsize, new_keys.itemsize)
+    keys = base._keys[kept].astype(f'S{width}')
+    at = np.searchsorted(keys, new_keys)
+    keys = np.insert(keys, at, new_keys)
+    order = np.insert(base_order[kept], at, new_order).astype('<i4')
+
+    sizes = [len(room_ids) for room_ids in ids]
+    _write_sections(path, _text_array(patch['departments']), _text_array(names),
+                    np.concatenate(([0], np.cumsum(sizes, dtype=np.int64))).astype('<i8'),
+                    np.concatenate(ids) if ids else _text_array([]),
+                    np.concatenate(codes).astype('<i4') if codes else np.array([], dtype='<i4'),
+                    np.concatenate(probabilities).astype('<f4') if probabilities else np.array([], dtype='<f4'),
+                    keys, order)
+
+
+class PackedArrangement:
+    """Read-only, memory-mapped view of a packed arrangement file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._identity = self._file_identity(os.fstat(f.fileno()))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, num_departments, department_width, num_rooms, room_width,
+         id_width, key_width, num_students) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a packed arrangement file: {path}")
+
+        offset = HEADER.size
+
+        def section(dtype, count):
+            nonlocal offset
+            offset = _align(offset)
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        self.departments = [name.decode() for name in section(f'S{department_width}', num_departments)]
+        self.room_names = [name.decode() for name in section(f'S{room_width}', num_rooms)]
+        self.room_offsets = section('<i8', num_rooms + 1)
+        self.student_ids = section(f'S{id_width}', num_students)
+        self.department_codes = section('<i4', num_students)
+        self.probabilities = section('<f4', num_students)
+        self._keys = section(f'S{key_width}', num_students)
+        self._order = section('<i4', num_students)
+        self._first_key = int(np.searchsorted(self._keys, b'', side='right'))  # Past the vacant seats
+        self._room_lookup = {name: i for i, name in enumerate(self.room_names)}
+
+    @staticmethod
+    def _file_identity(stat):
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns
+
+    def is_current(self):
+        """Return True while the mapped file is still the one at path (not expired or replaced)"""
+        try:
+            return self._file_identity(os.stat(self.path)) == self._identity
+        except FileNotFoundError:
+            return False
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def __contains__(self, room):
+        return room in self._room_lookup
+
+    def _span(self, room):
+        i = self._room_lookup[room]
+        return int(self.room_offsets[i]), int(self.room_offsets[i + 1])
+
+    def room_sizes(self):
+        """Return room name -> number of seats in use (including vacancies), in room order"""
+        return dict(zip(self.room_names, np.diff(self.room_offsets).tolist()))
+
+    def compact_room(self, room):
+        """Return a room's student IDs and department codes as parallel lists (None for vacant seats)"""
+        start, stop = self._span(room)
+        ids = np.char.decode(self.student_ids[start:stop]).tolist()
+        codes = self.department_codes[start:stop].tolist()
+        return {
+            'student_ids': [None if code == VACANT else student_id for student_id, code in zip(ids, codes)],
+            'department_codes': codes
+        }
+
+    def room_codes(self, room):
+        """Return a view of a room's department codes in seat order"""
+        start, stop = self._span(room)
+        return self.department_codes[start:stop]
+
+    def vacant_seats(self):
+        """Return room name -> seat numbers of the room's vacant seats, for rooms that have any"""
+        positions = np.sort(self._order[:self._first_key])
+        rooms = np.searchsorted(self.room_offsets, positions, side='right') - 1
+        vacant = {}
+        for room, position in zip(rooms.tolist(), positions.tolist()):
+            vacant.setdefault(self.room_names[room], []).append(position - int(self.room_offsets[room]) + 1)
+        return vacant
+
+    def to_compact(self):
+        """Return the whole arrangement in the compact form of ArrayArrangement.to_compact"""
+        return {
+            'departments': list(self.departments),
+            'rooms': {room: self.compact_room(room) for room in self.room_names}
+        }
+
+    def probability_map(self):
+        """Return student ID -> attendance probability for students with a known probability"""
+        ids = np.char.decode(self.student_ids).tolist()
+        return {student_id: probability for student_id, probability in zip(ids, self.probabilities.tolist())
+                if not math.isnan(probability)}
+
+    def iter_rows(self):
+        """Yield (room, seat number, student ID, department) in seating order, blank for vacant seats"""
+        for room in self.room_names:
+            data = self.compact_room(room)
+            for seat_num, (student_id, code) in enumerate(zip(data['student_ids'], data['department_codes']), 1):
+                if code == VACANT:
+                    yield room, seat_num, '', ''
+                else:
+                    yield room, seat_num, student_id, self.departments[code]
+
+    def _seat(self, position):
+        room = int(np.searchsorted(self.room_offsets, position, side='right')) - 1
+        seat = int(position - self.room_offsets[room]) + 1
+        return self.student_ids[position].decode(), self.room_names[room], seat
+
+    def find(self, student_id):
+        """Return (student ID, room, seat number) of a student, or None if they are not seated"""
+        key = normalize(student_id).encode()
+        i = int(np.searchsorted(self._keys, key))
+        if key and i < len(self._keys) and self._keys[i] == key:
+            return self._seat(self._order[i])
+        return None
+
+    def prefix(self, prefix, limit=10):
+        """Return up to limit seated students whose ID starts with prefix, and whether there are more"""
+        key = normalize(prefix).encode()
+        start = max(int(np.searchsorted(self._keys, key)), self._first_key)
+        matches = []
+        for i in range(start, min(start + limit + 1, len(self._keys))):
+            if not self._keys[i].startswith(key):
+                break
+            matches.append(self._seat(self._order[i]))
+        return matches[:limit], len(matches) > limit
@@ -0,0 +1,133 @@
+"""Room placement engines used by SeatingManager.
+
+Each engine takes the (already shuffled) sequence of student departments and
+returns, for every student, the zero-based index of the room they were placed
+in, or None when every room is already full. Departments can be any hashable
+value, so the same engines work on department names or integer codes.
+
+seats_per_room is either one capacity shared by every room or a list with
+each room's capacity. Engines can also continue from a partly filled state
+(per-room occupancy and the departments of each room's most recent seats),
+which is how new students are appended to a stored arrangement without
+re-placing everyone.
+"""
+import heapq
+from collections import deque
+
+
+def _initial_state(num_rooms, seats_per_room, department_buffer, occupancy, history):
+    capacity = list(seats_per_room) if isinstance(seats_per_room, (list, tuple)) else [seats_per_room] * num_rooms
+    occupancy = list(occupancy) if occupancy is not None else [0] * num_rooms
+    history = [deque(history[room] if history is not None else (), maxlen=department_buffer)
+               for room in range(num_rooms)]
+    return capacity, occupancy, history
+
+
+def scan_placement(departments, num_rooms, seats_per_room, department_buffer,
+                   occupancy=None, history=None):
+    """Place students by scanning every room in order for each student"""
+    capacity, occupancy, history = _initial_state(num_rooms, seats_per_room, department_buffer,
+                                                  occupancy, history)
+    assignments = []
+
+    for dept in departments:
+        room = None
+        for candidate in range(num_rooms):
+            if occupancy[candidate] < capacity[candidate] and dept not in history[candidate]:
+                history[candidate].append(dept)
+                room = candidate
+                break
+
+        if room is None:  # Fallback placement
+            for candidate in range(num_rooms):
+                if occupancy[candidate] < capacity[candidate]:
+                    room = candidate
+                    break
+
+        if room is not None:
+            occupancy[room] += 1
+        assignments.append(room)
+
+    return assignments
+
+
+def indexed_placement(departments, num_rooms, seats_per_room, department_buffer,
+                      occupancy=None, history=None):
+    """Place students using a free-room heap and a per-department room index
+
+    Produces exactly the same assignments as scan_placement. For every
+    department seen so far we keep a min-heap of rooms whose recent history
+    does not contain that department; entries are invalidated lazily when
+    a room fills up or the department re-enters its history window, and a
+    room is pushed back when the department is evicted from the window.
+    """
+    capacity, occupancy, history = _initial_state(num_rooms, seats_per_room, department_buffer,
+                                                  occupancy, history)
+    open_rooms = list(range(num_rooms))  # Sorted, so already a valid heap
+    eligible = {}
+    assignments = []
+
+    for dept in departments:
+        heap = eligible.get(dept)
+        if heap is None:
+            heap = [room for room in open_rooms
+                    if occupancy[room] < capacity[room] and dept not in history[room]]
+            heapq.heapify(heap)
+            eligible[dept] = heap
+
+        while heap and (occupancy[heap[0]] >= capacity[heap[0]] or dept in history[heap[0]]):
+            heapq.heappop(heap)
+
+        if heap:
+            room = heap[0]
+            window = history[room]
+            evicted = window[0] if department_buffer and len(window) == department_buffer else None
+            window.append(dept)
+            if evicted is not None and evicted not in window and evicted in eligible:
+                heapq.heappush(eligible[evicted], room)
+        else:  # Fallback placement
+            while open_rooms and occupancy[open_rooms[0]] >= capacity[open_rooms[0]]:
+                heapq.heappop(open_rooms)
+            room = open_rooms[0] if open_rooms else None
+
+        if room is not None:
+            occupancy[room] += 1
+        assignments.append(room)
+
+    return assignments
+
+
+def best_fit_placement(departments, num_rooms, seats_per_room, department_buffer,
+                       occupancy=None, history=None):
+    """Open as few rooms as possible, then place students in them
+
+    Rooms that already have students stay open. Further rooms are opened
+    largest first until the remaining students fit in one more room, which is
+    the smallest room that holds them (best fit). Students are then placed
+    over the open rooms by indexed_placement; with fewer rooms open, more of
+    them may need the fallback placement that ignores department_buffer.
+    """
+    capacity, occupancy, _ = _initial_state(num_rooms, seats_per_room, 0, occupancy, None)
+    free = [capacity[room] - occupancy[room] for room in range(num_rooms)]
+
+    chosen = {room for room in range(num_rooms) if occupancy[room] and free[room] > 0}
+    remaining = len(departments) - sum(free[room] for room in chosen)
+    candidates = sorted((room for room in range(num_rooms) if not occupancy[room] and free[room] > 0),
+                        key=lambda room: (-free[room], room))
+    while remaining > 0 and candidates:
+        fitting = [room for room in candidates if free[room] >= remaining]
+        room = min(fitting, key=lambda room: (free[room], room)) if fitting else candidates[0]
+        candidates.remove(room)
+        chosen.add(room)
+        remaining -= free[room]
+
+    # Unchosen rooms are treated as full
+    occupancy = [occupancy[room] if room in chosen else capacity[room] for room in range(num_rooms)]
+    return indexed_placement(departments, num_rooms, capacity, department_buffer, occupancy, history)
+
+
+PLACEMENT_ENGINES = {
+    'greedy': scan_placement,
+    'indexed': indexed_placement,
+    'best_fit': best_fit_placement,
+}
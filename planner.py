@@ -0,0 +1,84 @@
+"""Capacity planning: the fewest rooms that seat a roster without fallbacks.
+
+A placement is clean when every student is seated and none of them needed
+the fallback placement that ignores department_buffer. Placement engines
+only return room indices, but a student was placed by the fallback exactly
+when their department was already in the room's recent-history window, so
+replaying the assignments recovers the fallback count.
+
+The search probes room counts with the same shuffled student order every
+time (the one SeatingManager.arrange_frame uses for the plan's seed), so the
+planned room count can be reproduced by arranging with that seed:
+
+1. a lower bound from total capacity and from the largest department, which
+   can take at most every (department_buffer + 1)-th seat of a room;
+2. doubling from the lower bound until a room count is clean;
+3. binary search between the last unclean and the first clean count.
+"""
+import math
+from collections import Counter, deque
+
+
+def count_fallbacks(departments, assignments, num_rooms, department_buffer):
+    """Return how many students were placed by the fallback that ignores department_buffer"""
+    history = [deque(maxlen=department_buffer) for _ in range(num_rooms)]
+    fallbacks = 0
+    for dept, room in zip(departments, assignments):
+        if room is None:
+            continue
+        if dept in history[room]:
+            fallbacks += 1
+        else:
+            history[room].append(dept)
+    return fallbacks
+
+
+def room_lower_bound(departments, seats_per_room, department_buffer):
+    """Return a number of rooms below which a clean placement is impossible"""
+    if not departments:
+        return 1
+    per_room = math.ceil(seats_per_room / (department_buffer + 1))  # Seats one department can take
+    largest = max(Counter(departments).values())
+    return max(math.ceil(len(departments) / seats_per_room), math.ceil(largest / per_room), 1)
+
+
+def plan_rooms(place, departments, seats_per_room, department_buffer, max_rooms):
+    """Search for the fewest rooms whose placement is clean
+
+    place(num_rooms) returns the engine's assignments of departments over
+    that many rooms. Returns the plan with every probe made; num_rooms is
+    None when even max_rooms rooms are not clean.
+    """
+    probes = {}
+
+    def clean(num_rooms):
+        if num_rooms not in probes:
+            assignments = place(num_rooms)
+            probes[num_rooms] = {
+                'num_rooms': num_rooms,
+                'unseated': sum(room is None for room in assignments),
+                'fallbacks': count_fallbacks(departments, assignments, num_rooms, department_buffer),
+                'rooms_used': len({room for room in assignments if room is not None})
+            }
+        probe = probes[num_rooms]
+        return probe['unseated'] == 0 and probe['fallbacks'] == 0
+
+    lower_bound = room_lower_bound(departments, seats_per_room, department_buffer)
+    plan = {'num_rooms': None, 'rooms_used': None, 'lower_bound': lower_bound}
+    if lower_bound <= max_rooms:
+        # Double until clean, then binary search the last doubling step
+        low, high = lower_bound, lower_bound
+        while not clean(high) and high < max_rooms:
+            low, high = high + 1, min(high * 2, max_rooms)
+        if clean(high):
+            while low < high:
+                middle = (low + high) // 2
+                if clean(middle):
+                    high = middle
+                else:
+                    low = middle + 1
+            plan['num_rooms'] = high
+            plan['rooms_used'] = probes[high]['rooms_used']
+
+    plan['probes'] = sorted(probes.values(), key=lambda probe: probe['num_rooms'])
+    return plan
@@ -0,0 +1,117 @@
+"""Table-driven attendance prediction.
+
+A rule set is plain data: probability bins over one column (past attendance
+by default), a per-year bonus, clipping bounds and the cutoff above which a
+student is predicted to attend. Rule sets are compiled once into sorted bin
+edges and a probability table, so predicting is a single np.digitize pass and
+a table lookup over the two columns involved.
+
+Extra rule sets can be loaded from a JSON file mapping names to rule sets:
+
+    {"lenient": {"bins": [{"upper": 0.5, "probability": 0.6},
+                          {"probability": 0.9}],
+                 "year_bonus": 0.0, "cutoff": 0.55}}
+
+Each bin but the last has an upper bound; include_upper says whether a value
+equal to the bound still falls in that bin (default false).
+"""
+import json
+import math
+from functools import cached_property
+
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+DEFAULT_RULE_SET = {
+    'column': 'Past_Attendance',
+    'bins': [
+        {'upper': 0.6, 'probability': 0.5},
+        {'upper': 0.8, 'include_upper': True, 'probability': 0.7},
+        {'probability': 0.9}
+    ],
+    'missing_probability': 0.0,
+    'year_column': 'Year',
+    'year_bonus': 0.02,  # Per year of study above base_year
+    'base_year': 1,
+    'clip': [0.0, 1.0],
+    'cutoff': 0.65  # Predicted to attend when the probability is above this
+}
+
+
+class RuleSet:
+    def __init__(self, spec):
+        spec = {**DEFAULT_RULE_SET, **spec}
+        bins = spec['bins']
+        if not bins or 'upper' in bins[-1]:
+            raise ValueError("The last bin must not have an upper bound")
+        uppers = [float(b['upper']) for b in bins[:-1]]
+        if uppers != sorted(uppers):
+            raise ValueError("Bin upper bounds must be in ascending order")
+
+        self.spec = spec
+        self.column = spec['column']
+        self.year_column = spec['year_column']
+        self.year_bonus = float(spec['year_bonus'])
+        self.base_year = spec['base_year']
+        self.clip = spec['clip']
+        self.cutoff = float(spec['cutoff'])
+
+    # The arrays are built on first use, so loading rule sets at startup does not import numpy
+    @cached_property
+    def edges(self):
+        """Sorted bin edges for np.digitize"""
+        # A value equal to an inclusive bound belongs below it, so that edge moves up one ulp
+        return np.array([np.nextafter(float(b['upper']), math.inf) if b.get('include_upper')
+                         else float(b['upper']) for b in self.spec['bins'][:-1]])
+
+    @cached_property
+    def table(self):
+        """Probability of each bin, followed by the probability for missing values"""
+        return np.array([float(b['probability']) for b in self.spec['bins']]
+                        + [float(self.spec['missing_probability'])])
+
+    def probabilities(self, values, years):
+        """Return attendance probabilities for arrays of column values and years of study"""
+        values = np.asarray(values, dtype=float)
+        index = np.digitize(values, self.edges)
+        index[np.isnan(values)] = len(self.table) - 1
+        probability = self.table[index] + (np.asarray(years) - self.base_year) * self.year_bonus
+        return np.clip(probability, *self.clip)
+
+    def apply(self, df):
+        """Return the frame with Attendance_Probability and Predicted_Attendance added
+
+        Only the two rule columns are read; the returned frame shares the
+        other columns with df instead of copying them.
+        """
+        probability = self.probabilities(df[self.column].to_numpy(), df[self.year_column].to_numpy())
+        return df.assign(Attendance_Probability=probability,
+                         Predicted_Attendance=(probability > self.cutoff).astype(int))
+
+    def describe(self):
+        """Describe the rules in plain sentences"""
+        rules = []
+        lower = None
+        for b in self.spec['bins']:
+            if 'upper' in b:
+                condition = f"{self.column} {'<=' if b.get('include_upper') else '<'} {b['upper']}"
+                if lower is not None:
+                    condition = f"{lower} and {condition}"
+                lower = f"{self.column} {'>' if b.get('include_upper') else '>='} {b['upper']}"
+            else:
+                condition = lower or 'all students'
+            rules.append(f"{condition}: {b['probability']} probability")
+        if self.year_bonus:
+            rules.append(f"Bonus of {self.year_bonus} per year of study above year {self.base_year}")
+        rules.append(f"Students with final probability > {self.cutoff} are predicted to attend")
+        return rules
+
+
+def load_rule_sets(path=None):
+    """Compile the default rule set plus any named rule sets from a JSON file"""
+    specs = {'default': {}}
+    if path:
+        with open(path) as f:
+            specs.update(json.load(f))
+    return {name: RuleSet(spec) for name, spec in specs.items()}
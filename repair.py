@@ -0,0 +1,207 @@
+"""Incremental repair of stored arrangements.
+
+When a few students are added or dropped, or a room is closed or resized, only
+the rooms touched by the change are decoded and edited instead of re-placing
+the whole roster: removed students are found through the packed file's lookup
+index, and the result is a patch of the changed rooms that write_packed_update
+merges with the untouched ones. Students who stay keep their seats; a room is
+never closed up:
+
+- a removed student leaves a vacancy, which is offered to a student who needs
+  a seat (added, or displaced from a closed or shrunk room) and whose
+  department fits between the vacancy's neighbours;
+- a vacancy nobody fits into is filled by moving the room's last student into
+  it when that student fits, and otherwise stays empty;
+- the remaining students are appended to rooms with free seats by the
+  manager's placement engine, continuing from each room's current state, and
+  only take a vacancy that breaks the rule when every free seat is gone (as
+  the engines themselves fall back when every room breaks it).
+
+A department fits a seat when none of the department_buffer seats on either
+side of it belong to the same department, which is the constraint the
+placement engines enforce while filling a room. Vacant seats (department code
+VACANT, student ID None) are kept in the repaired arrangement and reported.
+"""
+from collections import defaultdict, deque
+
+from arrangement import VACANT
+
+
+def fits(codes, seat, code, department_buffer):
+    """Return True if no seat within department_buffer of seat has the same code"""
+    start = max(0, seat - department_buffer)
+    stop = min(len(codes), seat + department_buffer + 1)
+    return all(codes[k] != code for k in range(start, stop) if k != seat)
+
+
+def _fill_from_tail(ids, codes, department_buffer):
+    """Move a room's last students into its vacancies where they fit, returning the students moved"""
+    moved = 0
+    seat = 0
+    while True:
+        while codes and codes[-1] == VACANT:
+            ids.pop()
+            codes.pop()
+        while seat < len(codes) and codes[seat] != VACANT:
+            seat += 1
+        if seat >= len(codes):
+            return moved
+
+        last = len(codes) - 1
+        code = codes[last]
+        codes[last] = VACANT
+        if fits(codes, seat, code, department_buffer):
+            ids[seat], codes[seat] = ids[last], code
+            ids[last] = None
+            moved += 1
+        else:
+            codes[last] = code
+        seat += 1
+
+
+def repair_arrangement(arrangement, manager, add=(), remove=(), capacities=None):
+    """Work out the rooms of a packed arrangement that a roster or room change touches
+
+    add is a list of Student_ID/Department dicts, remove a list of student IDs
+    (matched like seat lookups) and capacities maps room names to their new
+    number of seats (0 closes a room). Removed students are located with the
+    arrangement's lookup index and only the rooms that change are decoded.
+    Returns a patch in compact form, holding the whole department dictionary
+    and only the changed rooms (an emptied room has no seats), and a report of
+    what changed.
+    """
+    capacities = {**dict(zip(manager.room_names, manager.capacities)), **(capacities or {})}
+    unknown_rooms = set(capacities) - set(manager.room_names)
+    if unknown_rooms:
+        raise ValueError(f"Unknown rooms: {', '.join(sorted(unknown_rooms))}")
+    if any(capacity < 0 for capacity in capacities.values()):
+        raise ValueError("Room capacities cannot be negative")
+
+    departments = list(arrangement.departments)
+    department_codes = {dept: code for code, dept in enumerate(departments)}
+    sizes = arrangement.room_sizes()
+    vacant = {room: [seat - 1 for seat in seats] for room, seats in arrangement.vacant_seats().items()}
+    edited = {}
+
+    def edit(room):
+        if room not in edited:
+            data = arrangement.compact_room(room) if room in sizes else {'student_ids': [], 'department_codes': []}
+            edited[room] = (data['student_ids'], data['department_codes'])
+        return edited[room]
+
+    def room_codes(room):
+        if room in edited:
+            return edited[room][1]
+        return arrangement.room_codes(room) if room in sizes else []
+
+    # Removed students leave vacancies; also check that added IDs are new
+    add_ids = {student['Student_ID'] for student in add}
+    if len(add_ids) != len(add):
+        raise ValueError("Duplicate Student_ID values in added students")
+    vacated = {}
+    unknown = []
+    for student_id in remove:
+        seat = arrangement.find(student_id)
+        if seat is None:
+            unknown.append(student_id)
+        else:
+            vacated[seat[1:]] = seat[0]
+    if unknown:
+        raise ValueError(f"Unknown student IDs: {', '.join(map(str, sorted(unknown)))}")
+    duplicates = []
+    for student_id in add_ids:
+        seat = arrangement.find(student_id)
+        if seat is not None and seat[1:] not in vacated:
+            duplicates.append(student_id)
+    if duplicates:
+        raise ValueError(f"Students already seated: {', '.join(map(str, sorted(duplicates)))}")
+    seated = len(arrangement) - sum(map(len, vacant.values())) - len(vacated) + len(add)
+    for room, seat in vacated:
+        ids, codes = edit(room)
+        ids[seat - 1], codes[seat - 1] = None, VACANT
+        vacant.setdefault(room, []).append(seat - 1)
+
+    total_capacity = sum(capacities.values())
+    if seated > total_capacity:
+        raise ValueError(f"Insufficient capacity: {seated} students vs {total_capacity} seats")
+
+    # Students needing a seat: displaced by closed or shrunk rooms, then added
+    pending = []
+    for room, capacity in capacities.items():
+        if sizes.get(room, 0) > capacity:
+            ids, codes = edit(room)
+            pending.extend((student_id, code) for student_id, code in zip(ids[capacity:], codes[capacity:])
+                           if code != VACANT)
+            del ids[capacity:], codes[capacity:]
+    displaced = len(pending)
+    for student in add:
+        code = department_codes.setdefault(student['Department'], len(department_codes))
+        if code == len(departments):
+            departments.append(student['Department'])
+        pending.append((student['Student_ID'], code))
+
+    def vacancies(room):
+        codes = room_codes(room)
+        return [seat for seat in sorted(vacant.get(room, ())) if seat < len(codes) and codes[seat] == VACANT]
+
+    # Offer vacancies to pending students, largest department first
+    waiting = defaultdict(deque)
+    placed = set()
+    for student_id, code in pending:
+        waiting[code].append(student_id)
+    for room in manager.room_names if pending else ():
+        codes = room_codes(room)
+        for seat in vacancies(room):
+            for candidate in sorted(waiting, key=lambda c: -len(waiting[c])):
+                if waiting[candidate] and fits(codes, seat, candidate, manager.department_buffer):
+                    ids, codes = edit(room)
+                    ids[seat], codes[seat] = waiting[candidate].popleft(), candidate
+                    placed.add(ids[seat])
+                    break
+
+    moved = displaced
+    for ids, codes in edited.values():
+        moved += _fill_from_tail(ids, codes, manager.department_buffer)
+
+    # Append everyone left over, continuing each room's placement state
+    leftover = [student for student in pending if student[0] not in placed]
+    if leftover:
+        occupancy, history = [], []
+        for room in manager.room_names:
+            codes = room_codes(room)
+            occupancy.append(len(codes))
+            history.append([int(code) for code in codes[-manager.department_buffer:]]
+                           if manager.department_buffer else [])
+        assignments = manager.place([code for _, code in leftover], occupancy, history,
+                                    [capacities[room] for room in manager.room_names])
+        unplaced = []
+        for student, room_index in zip(leftover, assignments):
+            if room_index is None:
+                unplaced.append(student)
+                continue
+            ids, codes = edit(manager.room_names[room_index])
+            ids.append(student[0])
+            codes.append(student[1])
+        # Every free seat is taken, so the rest go to vacancies whatever their neighbours
+        for room in manager.room_names if unplaced else ():
+            for seat in vacancies(room)[:len(unplaced)]:
+                ids, codes = edit(room)
+                ids[seat], codes[seat] = unplaced.pop()
+
+    rooms = {}
+    remaining = {}
+    for room in manager.room_names:
+        if room in edited:
+            ids, codes = edited[room]
+            rooms[room] = {'student_ids': ids, 'department_codes': codes}
+        seats = [seat + 1 for seat in vacancies(room)]
+        if seats:
+            remaining[room] = seats
+
+    return {'departments': departments, 'rooms': rooms}, {
+        'added': len(add),
+        'removed': len(vacated),
+        'moved': moved,
+        'rooms_changed': list(rooms),
+        'vacancies': remaining
+    }
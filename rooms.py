@@ -0,0 +1,162 @@
+"""Room inventory: per-room capacities and seat layouts.
+
+Each room is a grid of rows x columns seats, minus any blocked seats, and
+optionally capped at a capacity below what the grid holds. Students fill a
+room's usable seats in row-major order. Inventories are uploaded as CSV or
+JSON with the columns of INVENTORY_COLUMNS (only Room and either Capacity or
+Rows/Columns are required), for example:
+
+    Room,Capacity,Rows,Columns,Blocked_Seats
+    Main Hall,300,15,21,1-1;1-21
+    Lab 2,24,,,
+
+Blocked_Seats lists row-column pairs (1-based) separated by semicolons; in
+JSON it can also be a list of [row, column] pairs. Rooms given only a
+capacity get DEFAULT_COLUMNS seats per row.
+
+Seat positions and grid adjacency only depend on a room's layout, so they are
+computed once per distinct layout and cached.
+"""
+import json
+import math
+from functools import lru_cache
+
+from lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+INVENTORY_COLUMNS = ['Room', 'Capacity', 'Rows', 'Columns', 'Blocked_Seats']
+DEFAULT_COLUMNS = 6
+
+
+@lru_cache(maxsize=1024)
+def grid_positions(rows, columns, blocked, capacity):
+    """Return the (row, column) of every usable seat in seating order"""
+    positions = [(row, column) for row in range(1, rows + 1) for column in range(1, columns + 1)
+                 if (row, column) not in blocked]
+    return positions[:capacity]
+
+
+@lru_cache(maxsize=1024)
+def grid_neighbors(rows, columns, blocked, capacity):
+    """Return, for every usable seat, the seat indices left/right and in front/behind it"""
+    positions = grid_positions(rows, columns, blocked, capacity)
+    index = {position: k for k, position in enumerate(positions)}
+    return [[index[adjacent] for adjacent in ((row, column - 1), (row, column + 1),
+                                              (row - 1, column), (row + 1, column))
+             if adjacent in index]
+            for row, column in positions]
+
+
+class Room:
+    def __init__(self, name, rows, columns, blocked=(), capacity=None):
+        if rows < 1 or columns < 1:
+            raise ValueError(f"Room '{name}': rows and columns must be positive")
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.blocked = frozenset(blocked)
+        usable = self._usable_seats(rows)
+        if capacity is None:
+            capacity = usable
+        if not 0 < capacity <= usable:
+            raise ValueError(f"Room '{name}': capacity must be between 1 and {usable} seats")
+        self.capacity = capacity
+
+    @classmethod
+    def with_capacity(cls, name, capacity, columns=DEFAULT_COLUMNS):
+        """A room of full rows of columns seats holding capacity students"""
+        columns = min(columns, max(capacity, 1))
+        return cls(name, math.ceil(capacity / columns), columns, capacity=capacity)
+
+    def _usable_seats(self, rows):
+        return rows * self.columns - len({seat for seat in self.blocked
+                                          if 1 <= seat[0] <= rows and 1 <= seat[1] <= self.columns})
+
+    def resized(self, capacity):
+        """The same room holding capacity students, with rows of seats added when its grid is too small"""
+        rows = self.rows
+        while self._usable_seats(rows) < capacity:
+            rows += 1
+        return Room(self.name, rows, self.columns, self.blocked, capacity)
+
+    @property
+    def _layout(self):
+        return self.rows, self.columns, self.blocked, self.capacity
+
+    def positions(self):
+        """(row, column) of each seat in seating order"""
+        return grid_positions(*self._layout)
+
+    def neighbors(self):
+        """Adjacent seat indices of each seat (cached per layout)"""
+        return grid_neighbors(*self._layout)
+
+    def to_dict(self):
+        return {'name': self.name, 'rows': self.rows, 'columns': self.columns,
+                'blocked': sorted(list(seat) for seat in self.blocked), 'capacity': self.capacity}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['rows'], data['columns'],
+                   [tuple(seat) for seat in data.get('blocked', [])], data.get('capacity'))
+
+
+def uniform_rooms(num_rooms, seats_per_room, columns=DEFAULT_COLUMNS):
+    """The classic inventory: num_rooms identical rooms named Room-1 ... Room-n"""
+    return [Room.with_capacity(f'Room-{room_num}', seats_per_room, columns)
+            for room_num in range(1, num_rooms + 1)]
+
+
+def _parse_blocked(value):
+    if isinstance(value, list):
+        return [tuple(int(part) for part in seat) for seat in value]
+    if value is None or (isinstance(value, float) and math.isnan(value)) or not str(value).strip():
+        return []
+    try:
+        return [tuple(int(part) for part in seat.split('-')) for seat in str(value).split(';') if seat.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid blocked seats '{value}', expected row-column pairs like 1-3;2-5")
+
+
+def _optional_int(record, key):
+    value = record.get(key)
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value == '':
+        return None
+    return int(value)
+
+
+def parse_inventory(records):
+    """Build rooms from inventory records (dicts keyed by INVENTORY_COLUMNS)"""
+    rooms = []
+    for record in records:
+        name = str(record.get('Room') or '').strip()
+        if not name:
+            raise ValueError("Every room needs a name in the 'Room' column")
+        capacity = _optional_int(record, 'Capacity')
+        rows = _optional_int(record, 'Rows')
+        columns = _optional_int(record, 'Columns')
+        blocked = _parse_blocked(record.get('Blocked_Seats'))
+        if rows and columns:
+            rooms.append(Room(name, rows, columns, blocked, capacity))
+        elif capacity:
+            rooms.append(Room.with_capacity(name, capacity, columns or DEFAULT_COLUMNS))
+        else:
+            raise ValueError(f"Room '{name}' needs a Capacity or both Rows and Columns")
+
+    names = [room.name for room in rooms]
+    if not rooms:
+        raise ValueError("The room inventory is empty")
+    if len(set(names)) != len(names):
+        raise ValueError("Room names must be unique")
+    return rooms
+
+
+def load_inventory(filepath):
+    """Read a room inventory from a CSV or JSON file"""
+    if filepath.lower().endswith('.json'):
+        with open(filepath) as f:
+            data = json.load(f)
+        return parse_inventory(data.get('rooms', []) if isinstance(data, dict) else data)
+    df = pd.read_csv(filepath, dtype={'Room': str, 'Blocked_Seats': str})
+    return parse_inventory(df.to_dict('records'))
@@ -0,0 +1,46 @@
+"""Multi-slot exam scheduling.
+
+A single SeatingManager describes the shared room inventory and is reused for
+every exam slot of the day. Slots are independent of each other, so they can
+be arranged concurrently in a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from lazy import lazy_import
+
+np = lazy_import('numpy')
+
+SLOT_COLUMN = 'Exam_Slot'
+
+
+def split_slots(df, slot_column=SLOT_COLUMN):
+    """Split one roster into per-slot frames, in order of first appearance"""
+    return {str(slot): frame for slot, frame in df.groupby(slot_column, sort=False)}
+
+
+def arrange_slot(task):
+    """Arrange one slot's students (process pool worker)"""
+    manager, students_df, seed = task
+    return manager.arrange_frame(students_df, rng=np.random.default_rng(seed))
+
+
+def schedule_slots(manager, slots, workers=0):
+    """Arrange every slot over the same rooms, returning slot -> ArrayArrangement"""
+    for slot, students_df in slots.items():
+        try:
+            manager.validate_capacity(len(students_df))
+        except ValueError as e:
+            raise ValueError(f"Slot '{slot}': {e}")
+
+    # Draw per-slot seeds up front so forked workers do not share one random state;
+    # a seeded manager always produces the same schedule
+    seeds = np.random.default_rng(manager.seed).integers(0, 2**32 - 1, size=len(slots))
+    tasks = [(manager, students_df[['Student_ID', 'Department']], int(seed))
+             for students_df, seed in zip(slots.values(), seeds)]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(arrange_slot, tasks))
+    else:
+        results = [arrange_slot(task) for task in tasks]
+    return dict(zip(slots, results))
@@ -0,0 +1,109 @@
+"""Seat-swap optimizer for array-backed arrangements.
+
+Starting from a placement produced by one of the engines, the solver lays each
+room out on its grid (its room layout, or rows of seats_per_row seats) and runs
+simulated annealing over seat swaps to minimize the number of adjacent
+(left/right, front/back) seats taken by students of the same department. Swap
+costs are computed incrementally from the neighbours of the two seats
+involved, and the search stops when the wall-clock budget runs out or no
+conflicts remain.
+"""
+import math
+import random
+import time
+
+
+def build_neighbors(room_offsets, seats_per_row, layouts=None):
+    """Return the adjacent seat positions of every seat, room by room
+
+    layouts optionally gives each room's seat adjacency (as from
+    Room.neighbors); otherwise rooms are rows of seats_per_row seats.
+    """
+    neighbors = []
+    for i, (start, stop) in enumerate(zip(room_offsets[:-1], room_offsets[1:])):
+        start, size = int(start), int(stop - start)
+        if layouts is not None:
+            neighbors.extend([start + q for q in layouts[i][k] if q < size] for k in range(size))
+            continue
+        for k in range(size):
+            adjacent = []
+            if k % seats_per_row:
+                adjacent.append(start + k - 1)
+            if (k + 1) % seats_per_row and k + 1 < size:
+                adjacent.append(start + k + 1)
+            if k >= seats_per_row:
+                adjacent.append(start + k - seats_per_row)
+            if k + seats_per_row < size:
+                adjacent.append(start + k + seats_per_row)
+            neighbors.append(adjacent)
+    return neighbors
+
+
+def count_conflicts(codes, neighbors):
+    """Count adjacent seat pairs taken by the same department"""
+    return sum(1 for p, adjacent in enumerate(neighbors)
+               for q in adjacent if q > p and codes[p] == codes[q])
+
+
+def _seat_conflicts(codes, neighbors, seat, code):
+    return sum(1 for q in neighbors[seat] if codes[q] == code)
+
+
+def swap_delta(codes, neighbors, a, b):
+    """Change in conflict count if the students at seats a and b swapped"""
+    code_a, code_b = codes[a], codes[b]
+    if code_a == code_b:
+        return 0
+    before = _seat_conflicts(codes, neighbors, a, code_a) + _seat_conflicts(codes, neighbors, b, code_b)
+    after = _seat_conflicts(codes, neighbors, a, code_b) + _seat_conflicts(codes, neighbors, b, code_a)
+    if b in neighbors[a]:
+        after -= 2  # Each seat saw the other's current code as a match
+    return after - before
+
+
+def optimize_seats(codes, room_offsets, seats_per_row=6, time_budget=1.0,
+                   initial_temperature=0.5, rng=None, layouts=None):
+    """Anneal seat swaps within the time budget
+
+    Returns the new seat order (indices into codes) and a report with the
+    conflict counts before and after, the swaps attempted and time spent.
+    """
+    rng = rng or random
+    started = time.perf_counter()
+    deadline = started + time_budget
+
+    codes = list(codes)
+    order = list(range(len(codes)))
+    neighbors = build_neighbors(room_offsets, seats_per_row, layouts)
+    conflicts = initial_conflicts = count_conflicts(codes, neighbors)
+    iterations = 0
+
+    while conflicts and len(codes) > 1:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        # Cool linearly, spending the last fifth of the budget on pure descent
+        progress = (now - started) / time_budget
+        temperature = initial_temperature * max(0.0, 1 - progress / 0.8)
+
+        for _ in range(256):
+            iterations += 1
+            a = rng.randrange(len(codes))
+            if not _seat_conflicts(codes, neighbors, a, codes[a]):
+                continue
+            b = rng.randrange(len(codes))
+            delta = swap_delta(codes, neighbors, a, b)
+            if delta <= 0 or (temperature and rng.random() < math.exp(-delta / temperature)):
+                codes[a], codes[b] = codes[b], codes[a]
+                order[a], order[b] = order[b], order[a]
+                conflicts += delta
+
+    if conflicts > initial_conflicts:
+        order, conflicts = list(range(len(codes))), initial_conflicts
+
+    return order, {
+        'conflicts_before': initial_conflicts,
+        'conflicts': conflicts,
+        'iterations': iterations,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
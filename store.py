@@ -0,0 +1,111 @@
+"""Server-side storage for generated seating arrangements.
+
+The session cookie only carries the arrangement's session_id; the arrangement
+itself lives in one of the stores below, selected with ARRANGEMENT_STORE.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryArrangementStore:
+    """In-process LRU store with a per-entry time to live"""
+
+    def __init__(self, ttl_seconds, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteArrangementStore:
+    """On-disk store shared by every worker process on the same machine"""
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS arrangements '
+                         '(key TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS arrangements_expires ON arrangements (expires)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data FROM arrangements WHERE key = ? AND expires > ?',
+                               (key, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, data):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM arrangements WHERE expires <= ?', (now,))
+            conn.execute('INSERT OR REPLACE INTO arrangements (key, data, expires) VALUES (?, ?, ?)',
+                         (key, json.dumps(data), now + self.ttl_seconds))
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM arrangements WHERE key = ?', (key,))
+
+
+class RedisArrangementStore:
+    """Store backed by Redis or any server speaking the Redis protocol"""
+
+    def __init__(self, url, ttl_seconds, prefix='seating:'):
+        try:
+            import redis
+        except ImportError:
+            raise ValueError("The 'redis' package is required for ARRANGEMENT_STORE=redis")
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return json.loads(data) if data is not None else None
+
+    def set(self, key, data):
+        self.client.set(self.prefix + key, json.dumps(data), ex=int(self.ttl_seconds))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+def create_store(backend, ttl_seconds, path=None, url=None, max_entries=256):
+    """Create the arrangement store selected by the ARRANGEMENT_STORE setting"""
+    if backend == 'memory':
+        return MemoryArrangementStore(ttl_seconds, max_entries)
+    if backend == 'sqlite':
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteArrangementStore(path, ttl_seconds)
+    if backend == 'redis':
+        return RedisArrangementStore(url, ttl_seconds)
+    raise ValueError(f"Unknown arrangement store: {backend}")